@@ -0,0 +1,220 @@
+"""Headless load test for vix-explainer.py.
+
+Replays interaction traces against the app with Streamlit's AppTest, one
+simulated session per worker thread, all in this process. That is the same
+threading model a single Streamlit replica uses. Reports rerun latency
+percentiles per action, plus CPU and RSS sampled over the run.
+
+    python loadtest.py --sessions 8 --iterations 3 --json results.json
+    python loadtest.py --baseline results.json  # exit 1 on p95 regression
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from streamlit.testing.v1 import AppTest
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "vix-explainer.py")
+ACTIVITIES = ["VIX Market Simulator", "Historical VIX Patterns", "VIX Prediction Challenge", "Volatility Regime Quiz"]
+
+def _by_label(elements, label):
+    for element in elements:
+        if element.label == label:
+            return element
+    raise LookupError(f"No element labelled {label!r}")
+
+# Each trace step is (action name, function(at, rng) -> AppTest ready to run)
+def trace_slider_drag(at, rng):
+    start = at.slider(key="vix_slider").value
+    for value in np.linspace(start, rng.uniform(10, 45), 6):
+        yield "slider_drag", lambda value=value: at.slider(key="vix_slider").set_value(round(float(value), 1))
+    yield "slider_drag", lambda: at.slider(key="prediction_days_slider").set_value(int(rng.choice([30, 45, 60, 90])))
+
+def trace_presets(at, rng):
+    labels = [b.label for b in at.button if b.label.startswith("Set ")]
+    for label in rng.sample(labels, len(labels)):
+        yield "preset_button", lambda label=label: _by_label(at.button, label).click()
+    yield "preset_button", lambda: at.sidebar.button[0].click()
+
+def trace_market_simulator(at, rng):
+    yield "select_activity", lambda: _by_label(at.selectbox, "Choose an activity:").set_value(ACTIVITIES[0])
+    for _ in range(3):
+        yield "market_simulator", lambda: _by_label(at.radio, "Market Trend").set_value(
+            rng.choice(["Bull Market", "Bear Market", "Sideways", "Crash"]))
+        yield "market_simulator", lambda: _by_label(at.button, "Run Simulation").click()
+
+def trace_quiz(at, rng):
+    yield "select_activity", lambda: _by_label(at.selectbox, "Choose an activity:").set_value(ACTIVITIES[3])
+    for _ in range(3):
+        yield "quiz", lambda: next(b for b in at.button if b.key and b.key.startswith("submit_")).click()
+        yield "quiz", lambda: next(b for b in at.button if b.key and b.key.startswith("next_")).click()
+
+TRACES = {
+    "slider_drag": trace_slider_drag,
+    "presets": trace_presets,
+    "market_simulator": trace_market_simulator,
+    "quiz": trace_quiz,
+}
+
+def run_session(app_path, trace_names, iterations, seed, timeout):
+    """Replay the traces in one AppTest session; returns [(action, seconds, error)]"""
+    rng = random.Random(seed)
+    at = AppTest.from_file(app_path, default_timeout=timeout)
+    samples = []
+    
+    def timed_run(action):
+        start = time.perf_counter()
+        try:
+            at.run()
+            error = str(at.exception[0].message) if at.exception else None
+        except Exception as exc:  # a timed-out or crashed rerun still counts as a sample
+            error = repr(exc)
+        samples.append((action, time.perf_counter() - start, error))
+    
+    timed_run("initial_load")
+    for _ in range(iterations):
+        for name in rng.sample(trace_names, len(trace_names)):
+            for action, prepare in TRACES[name](at, rng):
+                try:
+                    prepare()
+                except (LookupError, StopIteration, KeyError) as exc:
+                    samples.append((action, 0.0, f"element not found: {exc}"))
+                    continue
+                timed_run(action)
+    return samples
+
+def _rss_bytes():
+    """Current RSS on Linux, peak RSS on other Unixes, None where neither is available (Windows)"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        pass
+    try:
+        import resource  # Unix only
+    except ImportError:
+        return None
+    # Peak rather than current RSS, but the best available off Linux
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+def _rss_mb():
+    rss = _rss_bytes()
+    return None if rss is None else rss / 2**20
+
+def sample_resources(stop, interval, out):
+    """Append (elapsed s, CPU %, RSS MB or None) every interval seconds until stop is set"""
+    start = last_wall = time.perf_counter()
+    times = os.times()
+    last_cpu = times.user + times.system
+    while not stop.wait(interval):
+        now = time.perf_counter()
+        times = os.times()
+        cpu = times.user + times.system
+        out.append((now - start, 100 * (cpu - last_cpu) / (now - last_wall), _rss_mb()))
+        last_wall, last_cpu = now, cpu
+
+def summarize(samples, resources, wall_seconds):
+    by_action = {}
+    for action, seconds, error in samples:
+        by_action.setdefault(action, []).append((seconds, error))
+    
+    actions = {}
+    for action, entries in sorted(by_action.items()):
+        latencies = np.array([seconds for seconds, error in entries if error is None]) * 1000
+        actions[action] = {
+            "count": len(entries),
+            "errors": sum(error is not None for _, error in entries),
+        }
+        if latencies.size:
+            p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+            actions[action].update(p50_ms=p50, p95_ms=p95, p99_ms=p99, max_ms=latencies.max())
+    
+    cpu = np.array([c for _, c, _ in resources]) if resources else np.zeros(1)
+    rss_values = [r for _, _, r in resources] if resources else [_rss_mb()]
+    rss = np.array([r for r in rss_values if r is not None])
+    return {
+        "wall_seconds": wall_seconds,
+        "reruns": len(samples),
+        "reruns_per_second": len(samples) / wall_seconds,
+        "actions": actions,
+        "cpu_percent": {"mean": float(cpu.mean()), "max": float(cpu.max())},
+        "rss_mb": {"start": float(rss[0]), "end": float(rss[-1]), "max": float(rss.max())} if rss.size else None,
+        "timeline": resources,
+        "errors": sorted({error for _, _, error in samples if error})[:20],
+    }
+
+def compare_to_baseline(report, baseline, tolerance):
+    """List actions whose p95 latency got worse than tolerance x the baseline"""
+    regressions = []
+    for action, stats in report["actions"].items():
+        old = baseline.get("actions", {}).get(action, {}).get("p95_ms")
+        if old and stats.get("p95_ms", 0) > tolerance * old:
+            regressions.append(f"{action}: p95 {stats['p95_ms']:.0f} ms vs baseline {old:.0f} ms")
+    return regressions
+
+def print_report(report, sessions):
+    print(f"{sessions} sessions, {report['reruns']} reruns in {report['wall_seconds']:.1f} s "
+          f"({report['reruns_per_second']:.1f} reruns/s)")
+    print(f"{'action':<18}{'count':>7}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for action, stats in report["actions"].items():
+        print(f"{action:<18}{stats['count']:>7}{stats['errors']:>8}"
+              + "".join(f"{stats.get(k, float('nan')):>10.0f}" for k in ("p50_ms", "p95_ms", "p99_ms", "max_ms")))
+    rss = report["rss_mb"]
+    print(f"CPU: mean {report['cpu_percent']['mean']:.0f}%, max {report['cpu_percent']['max']:.0f}%   "
+          + (f"RSS: {rss['start']:.0f} -> {rss['end']:.0f} MB (max {rss['max']:.0f} MB)" if rss else "RSS: n/a"))
+    for error in report["errors"]:
+        print(f"error: {error}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--app", default=APP_PATH)
+    parser.add_argument("--sessions", type=int, default=4, help="concurrent simulated sessions")
+    parser.add_argument("--iterations", type=int, default=2, help="times each session replays its traces")
+    parser.add_argument("--traces", nargs="+", choices=sorted(TRACES), default=sorted(TRACES))
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds allowed per rerun")
+    parser.add_argument("--sample-interval", type=float, default=0.5, help="seconds between CPU/RSS samples")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the full report (including the CPU/RSS timeline) here")
+    parser.add_argument("--baseline", help="earlier --json report to check p95 latencies against")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="allowed p95 slowdown vs baseline")
+    args = parser.parse_args(argv)
+    
+    resources = []
+    stop = threading.Event()
+    sampler = threading.Thread(target=sample_resources, args=(stop, args.sample_interval, resources), daemon=True)
+    sampler.start()
+    
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.sessions) as pool:
+        futures = [pool.submit(run_session, args.app, args.traces, args.iterations, args.seed + i, args.timeout)
+                   for i in range(args.sessions)]
+        samples = [sample for future in futures for sample in future.result()]
+    wall_seconds = time.perf_counter() - start
+    stop.set()
+    sampler.join()
+    
+    report = summarize(samples, resources, wall_seconds)
+    report["config"] = vars(args)
+    print_report(report, args.sessions)
+    
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare_to_baseline(report, json.load(f), args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}")
+        return 1 if regressions else 0
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,109 +1,377 @@
 import streamlit as st
-import numpy as np
-import matplotlib.pyplot as plt
-import pandas as pd
-from scipy.stats import norm
-import datetime
+import hmac
+import io
+import json
+import os
+import pickle
+import threading
+import time
+import uuid
+
+from vix_metrics import (
+    IMPORT_TIMINGS,
+    export_metrics,
+    finish_rerun_profile,
+    increment,
+    lazy_import,
+    metrics_export_path,
+    metrics_snapshot,
+    profile_summary,
+    record_stage,
+    stage_timer,
+    start_rerun_profile,
+)
+
+# The model core (and numpy with it) is needed on every run; charts are
+# rendered in the browser, so altair and pandas only build the spec.
+np = lazy_import("numpy")
+lazy_import("vix_model")
+from vix_analytics import VIX_REGIMES, PremiumAnalytics, load_vix_history
+from vix_cache import shared_cache
+from vix_charts import (
+    band_frame,
+    band_layer,
+    color_scale,
+    layered_chart,
+    line_frame,
+    line_layer,
+    point_layer,
+    rule_layer,
+    text_layer,
+)
+from vix_etp import PATH_VIX_PREMIUM, simulate_etp_navs
+from vix_forecast import ForecastEvaluation
+from vix_model import (
+    calculate_mean_reversion_adjustment,
+    calculate_expected_vix,
+    predict_future_volatility,
+    simulate_event_vix,
+    simulate_market_paths,
+    stream_market_paths,
+    sweep_market_scenarios,
+    IncrementalVixPaths,
+    MARKET_TRENDS,
+    VOL_REGIMES,
+)
+from vix_options import (
+    CALENDAR_DAYS,
+    TRADING_DAYS,
+    atm_implied_vix,
+    black76_greeks,
+    black76_price,
+    load_option_quotes,
+    monte_carlo_option_prices,
+    quotes_implied_volatility,
+)
+from vix_risk import DEFAULT_THRESHOLDS, summarize_tail_risk
+from vix_store import SharedArrayStore
+from vix_universe import TABLE_FIELDS, correlation_matrix, load_underlyings, summarize_underlyings
+from vix_variance import (
+    DENSE_GRID,
+    cboe_variance,
+    constant_maturity_index,
+    fit_smiles,
+    model_free_variance,
+    quotes_variance_term_structure,
+)
 
 #######################################
-# 1) Define callback functions:
-#    - One to reset defaults
-#    - One to set Lab parameters
-#######################################
-def reset_parameters():
-    st.session_state["recent_vol_slider"] = 12.0
-    st.session_state["vix_slider"] = 16.0
-    st.session_state["mean_rev_speed_slider"] = 0.25
-    st.session_state["mean_rev_level_slider"] = 16.0
-    st.session_state["premium_factor_slider"] = 3.5
-    st.session_state["prediction_days_slider"] = 30
-
-def set_low_vol_parameters():
-    st.session_state["recent_vol_slider"] = 8.0
-    st.session_state["vix_slider"] = 11.0
-    st.session_state["mean_rev_speed_slider"] = 0.25
-    st.session_state["mean_rev_level_slider"] = 16.0
-    st.session_state["premium_factor_slider"] = 3.5
-    st.session_state["prediction_days_slider"] = 30
-
-def set_high_vol_parameters():
-    st.session_state["recent_vol_slider"] = 25.0
-    st.session_state["vix_slider"] = 30.0
-    st.session_state["mean_rev_speed_slider"] = 0.25
-    st.session_state["mean_rev_level_slider"] = 16.0
-    st.session_state["premium_factor_slider"] = 3.5
-    st.session_state["prediction_days_slider"] = 30
-
-def set_fear_parameters():
-    st.session_state["recent_vol_slider"] = 15.0
-    st.session_state["vix_slider"] = 28.0
-    st.session_state["mean_rev_speed_slider"] = 0.25
-    st.session_state["mean_rev_level_slider"] = 16.0
-    st.session_state["premium_factor_slider"] = 3.5
-    st.session_state["prediction_days_slider"] = 30
-
-def set_complacency_parameters():
-    st.session_state["recent_vol_slider"] = 15.0
-    st.session_state["vix_slider"] = 10.0
-    st.session_state["mean_rev_speed_slider"] = 0.25
-    st.session_state["mean_rev_level_slider"] = 16.0
-    st.session_state["premium_factor_slider"] = 3.5
-    st.session_state["prediction_days_slider"] = 30
+# 1) Scenario presets:
+#    - Loaded from scenarios.json (or $VIX_SCENARIO_FILE)
+#    - "default" is the reset state, every other entry gets a button
 #######################################
+SCENARIO_FILE = os.environ.get(
+    "VIX_SCENARIO_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios.json"),
+)
+
+# Local daily VIX / index history used for data-driven premium presets
+HISTORY_FILE = os.environ.get(
+    "VIX_HISTORY_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "vix_history.csv"),
+)
+
+# Noisy realizations drawn per historical event for the min/max envelope
+EVENT_REALIZATIONS = 1000
+
+# Path ensembles are simulated in float32 by default: half the memory of float64, well
+# within display precision. VIX_PATH_DTYPE=float64 restores the reference precision.
+PATH_DTYPE = np.dtype(os.environ.get("VIX_PATH_DTYPE", "float32"))
+
+# Preset parameter name -> sidebar slider key
+PARAMETER_SLIDERS = {
+    "recent_vol": "recent_vol_slider",
+    "vix": "vix_slider",
+    "mean_rev_speed": "mean_rev_speed_slider",
+    "mean_rev_level": "mean_rev_level_slider",
+    "premium_factor": "premium_factor_slider",
+    "prediction_days": "prediction_days_slider",
+}
 
-# VIX prediction functions
-def calculate_mean_reversion_adjustment(recent_vol, mean_rev_level, mean_rev_speed):
-    """Calculate the mean reversion component of future volatility change"""
-    return (mean_rev_level - recent_vol) * mean_rev_speed
+def load_scenario_presets(path=SCENARIO_FILE):
+    """Load the scenario registry, filling unspecified parameters from the default preset"""
+    with open(path, encoding="utf-8") as f:
+        presets = json.load(f)
+    defaults = presets["default"]["params"]
+    for preset in presets.values():
+        params = dict(defaults, **preset["params"])
+        # Match the slider value types so cache keys line up with live slider values
+        preset["params"] = {name: int(value) if name == "prediction_days" else float(value)
+                            for name, value in params.items()}
+    return presets
 
-def calculate_expected_vix(recent_vol, mean_rev_adjustment, premium_factor):
-    """Calculate what VIX 'should' be given current conditions"""
-    # The paper uses a relationship between squared values, but we simplify here
-    vol_adjustment = mean_rev_adjustment
-    volatility_premium = premium_factor
+def apply_preset(name):
+    """Button callback: copy a preset's parameters into the sidebar sliders"""
+    for param, value in SCENARIO_PRESETS[name]["params"].items():
+        st.session_state[PARAMETER_SLIDERS[param]] = value
+
+def session_state_bytes():
+    """Approximate size of this session's st.session_state, as pickled bytes"""
+    total = 0
+    for value in st.session_state.to_dict().values():
+        try:
+            total += len(pickle.dumps(value))
+        except Exception:  # widget values that cannot be pickled are not ours to measure
+            pass
+    return total
+
+def set_slider_value(key, value):
+    """Button callback: set a single sidebar slider"""
+    st.session_state[key] = value
+
+SCENARIO_PRESETS = load_scenario_presets()
+#######################################
+
+@st.cache_resource(max_entries=64, show_spinner=False)
+def get_path_extender(vix, future_vol, mean_rev_level, mean_rev_speed, n_paths, seed, *, path_dtype):
+    """Process-wide growable ensemble for one parameter set (everything except the horizon).
     
-    return recent_vol + vol_adjustment + volatility_premium
+    Call it the same way everywhere (path_dtype by keyword), so that equal
+    parameters hit the same cache_resource entry and share one extender.
+    """
+    return IncrementalVixPaths(vix, future_vol, mean_rev_level, mean_rev_speed, n_paths=n_paths, seed=seed,
+                               dtype=path_dtype)
 
-def predict_future_volatility(recent_vol, vix, expected_vix, mean_rev_adjustment):
-    """Predict future volatility based on VIX and recent volatility"""
-    # Mean reversion component
-    mean_rev_component = mean_rev_adjustment
+@shared_cache().memoize
+def compute_scenario_bundle(recent_vol, vix, mean_rev_speed, mean_rev_level, premium_factor,
+                            prediction_days, n_paths=1000, seed=0, path_dtype=PATH_DTYPE.name):
+    """Model outputs and float32 ensemble summary for one parameter set.
+    
+    Results live in the process-wide (and, with VIX_CACHE_DIR set, on-disk)
+    result cache, so every session and every restart shares them.
+    """
+    with stage_timer("model"):
+        mean_rev_adjustment = calculate_mean_reversion_adjustment(recent_vol, mean_rev_level, mean_rev_speed)
+        expected_vix_value = calculate_expected_vix(recent_vol, mean_rev_adjustment, premium_factor)
+        future_vol, predicted_change = predict_future_volatility(recent_vol, vix, expected_vix_value, mean_rev_adjustment)
     
-    # VIX deviation component (difference between actual VIX and expected VIX)
-    vix_deviation = vix - expected_vix
+    # Simulate a potential path for VIX: only days beyond the longest horizon seen so far are new
+    with stage_timer("simulation"):
+        extender = get_path_extender(vix, future_vol, mean_rev_level, mean_rev_speed, n_paths, seed,
+                                     path_dtype=path_dtype)
+        days_before = extender.days_simulated
+        vix_paths, vol_paths = extender.paths(prediction_days)
+        vix_path, vol_path = vix_paths[0].astype(np.float32), vol_paths[0].astype(np.float32)
+        summary = {name: values.astype(np.float32) if isinstance(values, np.ndarray) else values
+                   for name, values in extender.summary(prediction_days).items()}
+    increment("path_days_simulated", n_paths * (extender.days_simulated - days_before))
     
-    # Predicted change in volatility
-    predicted_change = mean_rev_component + (vix_deviation * 0.5)  # Dampening factor
+    return {
+        "mean_rev_adjustment": mean_rev_adjustment,
+        "expected_vix": expected_vix_value,
+        "future_vol": future_vol,
+        "predicted_change": predicted_change,
+        "vix_path": vix_path,
+        "vol_path": vol_path,
+        "summary": summary,
+    }
+
+@shared_cache().memoize
+def run_underlyings(table, days, n_paths, pairs, default_correlation, seed=0, path_dtype=PATH_DTYPE.name):
+    """Multi-index monitor: table is a tuple of (name, field values) rows, evaluated and simulated in one batch"""
+    rows = {name: dict(zip(TABLE_FIELDS, values)) for name, values in table}
+    corr = correlation_matrix([name for name, _ in table], dict(pairs), default_correlation)
+    with stage_timer("underlyings"):
+        summary = summarize_underlyings(rows, days, n_paths, corr, seed=seed, dtype=path_dtype)
+    increment("paths_simulated", n_paths * len(table))
+    return summary
+
+@shared_cache().memoize
+def run_market_risk(trend, regime, event_probability, days, n_paths, thresholds, seed=0, path_dtype=PATH_DTYPE.name):
+    """Tail-risk summary of a Market Simulator scenario, streamed through in blocks of paths"""
+    with stage_timer("market_risk"):
+        blocks = (vix for vix, _ in stream_market_paths(trend, regime, event_probability, days, n_paths,
+                                                        seed=seed, dtype=path_dtype))
+        summary = summarize_tail_risk(blocks, days, thresholds)
+    increment("paths_simulated", n_paths)
+    return summary
+
+@shared_cache().memoize
+def run_market_sweep(event_step, n_paths, horizons, seed=0):
+    """Cached Market Simulator sweep over the full trend x regime x event probability grid"""
+    with stage_timer("market_sweep"):
+        rows = sweep_market_scenarios(range(0, 101, event_step), horizons, n_paths=n_paths, seed=seed)
+    increment("paths_simulated", n_paths * len(MARKET_TRENDS) * len(VOL_REGIMES) * len(range(0, 101, event_step)))
+    return {"rows": rows}
+
+def render_sweep_chart(rows, metric):
+    """Small multiples of a sweep metric: one panel per trend x regime, one line per horizon"""
+    alt = lazy_import("altair")
+    frame = lazy_import("pandas").DataFrame(rows)
+    frame[metric] = frame[metric].astype(np.float32)
+    return alt.Chart(frame[["trend", "regime", "horizon", "event_probability", metric]]).mark_line(point=True).encode(
+        x=alt.X("event_probability:Q", title="Event Probability (%)"),
+        y=alt.Y(f"{metric}:Q", title=metric, scale=alt.Scale(type="symlog")),
+        color=alt.Color("horizon:O", title="Horizon (days)"),
+        tooltip=["trend:N", "regime:N", "horizon:O", "event_probability:Q", alt.Tooltip(f"{metric}:Q", format=".2f")],
+    ).properties(width=180, height=130).facet(
+        row=alt.Row("trend:N", title=None, sort=list(MARKET_TRENDS)),
+        column=alt.Column("regime:N", title=None, sort=list(VOL_REGIMES)),
+    ).resolve_scale(y="independent")
+
+def projection_chart(bundle, prediction_days):
+    """Projected paths, the ensemble's 90% range, today's levels and the expected VIX"""
+    days = np.arange(prediction_days)
+    vix_path, vol_path = bundle["vix_path"], bundle["vol_path"]
+    quantiles = bundle["summary"]["vix_quantiles"]
+    scale = color_scale({
+        "Projected VIX Path": "darkorange",
+        "Projected Realized Volatility Path": "darkblue",
+        "VIX 90% Range": "orange",
+        "Current VIX": "red",
+        "Current Realized Vol": "blue",
+        "Expected VIX Level": "green",
+    })
+    return layered_chart(
+        band_layer(band_frame(days, quantiles[0], quantiles[-1]), "VIX 90% Range", scale),
+        line_layer(line_frame(days, {"Projected VIX Path": vix_path, "Projected Realized Volatility Path": vol_path}),
+                   scale, "Days Forward", "Volatility Level (%)"),
+        point_layer([0, 0], [vix_path[0], vol_path[0]], ["Current VIX", "Current Realized Vol"], scale),
+        rule_layer("Expected VIX Level", scale, y=bundle["expected_vix"]),
+        title=f"VIX and Volatility Projection for Next {prediction_days} Days",
+    )
+
+@shared_cache().memoize
+def run_etp_simulation(current_vix, years, n_paths, term_premium, seed=0, path_dtype=PATH_DTYPE.name):
+    """Lab 4: VIX futures ETP NAVs from the default preset's dynamics, starting at current_vix"""
+    params = SCENARIO_PRESETS["default"]["params"]
+    with stage_timer("etp_simulation"):
+        result = simulate_etp_navs(current_vix, max(5.0, current_vix - PATH_VIX_PREMIUM), years * TRADING_DAYS,
+                                   params["mean_rev_level"], params["mean_rev_speed"], n_paths=n_paths,
+                                   term_premium=term_premium, seed=seed, dtype=path_dtype)
+    increment("paths_simulated", n_paths)
+    return result
+
+@shared_cache().memoize
+def compute_event_envelope(pre_vix, peak_vix, post_vix, days_to_peak, days_to_normalize,
+                           n_realizations, days_before, seed=0):
+    """Historical tab: one highlighted realization plus the min/max envelope of all of them"""
+    with stage_timer("event_simulation"):
+        days, realizations = simulate_event_vix(pre_vix, peak_vix, post_vix, days_to_peak, days_to_normalize,
+                                                n_realizations=n_realizations, days_before=days_before, seed=seed)
+    return {
+        "days": days,
+        "path": realizations[0].astype(np.float32),
+        "lower": realizations.min(axis=0).astype(np.float32),
+        "upper": realizations.max(axis=0).astype(np.float32),
+    }
+
+@shared_cache().memoize
+def model_free_variance_demo(atm_vol, skew, strike_spacing, days, forward=5000.0):
+    """Theory tab demo: index level from the exact smile, the dense spline fit and the CBOE sparse sum"""
+    expiry = days / CALENDAR_DAYS
+    def smile(log_moneyness):
+        return np.maximum(atm_vol + skew * log_moneyness, 0.05)
     
-    # Future volatility prediction
-    future_vol = recent_vol + predicted_change
+    listed = np.arange(np.ceil(0.5 * forward / strike_spacing), np.floor(1.5 * forward / strike_spacing) + 1) * strike_spacing
+    listed_vols = smile(np.log(listed / forward))
+    calls = black76_price(forward, listed, expiry, listed_vols)
+    puts = black76_price(forward, listed, expiry, listed_vols, is_call=False)
     
-    return future_vol, predicted_change
+    exact = model_free_variance([forward], [expiry], smile(DENSE_GRID)[None, :])[0]
+    dense = model_free_variance([forward], [expiry], fit_smiles([np.log(listed / forward)], [listed_vols]))[0]
+    cboe = cboe_variance(listed, calls, puts, forward, expiry)
+    return {"exact": 100 * np.sqrt(exact), "dense": 100 * np.sqrt(dense), "cboe": 100 * np.sqrt(cboe),
+            "n_strikes": listed.size}
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def get_premium_analytics(history_bytes):
+    """Premium analytics for one history file, shared across sessions; results are cached per window inside"""
+    history = load_vix_history(io.BytesIO(history_bytes))
+    return PremiumAnalytics(history["vix"], history["close"])
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def analyze_option_quotes(quote_bytes):
+    """Implied VIX and model-free indices for one uploaded quote file; the implied vols are solved once"""
+    quotes = load_option_quotes(io.BytesIO(quote_bytes))
+    if not quotes["price"].size:
+        raise ValueError("the file has a header but no quotes")
+    implied = quotes_implied_volatility(quotes)
+    expiries, variances = quotes_variance_term_structure(quotes, implied=implied)
+    return {
+        "n_quotes": int(quotes["price"].size),
+        "n_converged": int(implied[1].sum()),
+        "max_iterations": int(implied[2].max()),
+        "implied_vix": float(atm_implied_vix(quotes, implied=implied)),
+        "indices": {days: float(constant_maturity_index(expiries, variances, days)) for days in (9, 30, 93)}
+                   if expiries.size else {},
+    }
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def get_forecast_evaluation(history_bytes, horizon):
+    """Process-wide forecast benchmark per (history file, horizon); fitted windows are cached on it"""
+    history = load_vix_history(io.BytesIO(history_bytes))
+    return ForecastEvaluation(history["vix"], history["close"], horizon)
+
+@st.cache_resource(show_spinner=False)
+def get_array_store():
+    """Process-wide float32 store for session results, evicting sessions idle for VIX_SESSION_IDLE_SECONDS"""
+    return SharedArrayStore(idle_timeout=float(os.environ.get("VIX_SESSION_IDLE_SECONDS", "1800")))
 
-def simulate_vix_path(current_vix, future_vol, days, mean_rev_level, mean_rev_speed, noise_level=0.15):
-    """Simulate a potential path for VIX over future days"""
-    vix_path = [current_vix]
-    vol_path = [future_vol]
+@st.cache_resource(show_spinner=False)
+def warm_scenario_bundles(presets):
+    """Precompute every preset's bundle once per process, in the background.
     
-    for i in range(1, days):
-        # Mean reversion for volatility
-        vol_mr = calculate_mean_reversion_adjustment(vol_path[-1], mean_rev_level, mean_rev_speed)
-        
-        # Add some noise to volatility path
-        vol_noise = np.random.normal(0, noise_level * vol_path[-1])
-        new_vol = max(5, vol_path[-1] + vol_mr + vol_noise)
-        vol_path.append(new_vol)
-        
-        # VIX follows volatility with a premium and some noise
-        vix_premium = 3.5 + 0.2 * np.random.randn()
-        vix_noise = np.random.normal(0, noise_level * vix_path[-1])
-        new_vix = max(5, new_vol + vix_premium + vix_noise)
-        vix_path.append(new_vix)
+    Running this in a thread keeps it off the first request's critical path;
+    with a warm disk cache it only loads the stored bundles.
+    """
+    def warm():
+        for preset in presets.values():
+            compute_scenario_bundle(**preset["params"])
     
-    return vix_path, vol_path
+    thread = threading.Thread(target=warm, name="scenario-warmup", daemon=True)
+    thread.start()
+    return thread
+
+# Widgets inside an @st.fragment rerun only that fragment; programmatic reruns follow suit
+def rerun_fragment():
+    """st.rerun() scoped to the enclosing fragment when this is a fragment rerun, else the whole app"""
+    try:
+        st.rerun(scope="fragment")
+    except Exception:  # full-script run: there is no fragment to scope to
+        st.rerun()
 
 # Configure the Streamlit app
 st.set_page_config(layout="wide", page_title="VIX Explainer")
+
+# Per-session results live in a process-wide store; sessions only hold keys into it
+if "session_id" not in st.session_state:
+    st.session_state["session_id"] = uuid.uuid4().hex
+session_id = st.session_state["session_id"]
+array_store = get_array_store()
+array_store.touch(session_id)
+array_store.evict_idle()
+
+# Hidden admin panel with optional per-rerun cProfile capture. It is off unless VIX_ADMIN_TOKEN
+# is set, and then opens with ?admin=<token> in the URL.
+rerun_start = time.perf_counter()
+admin_token = os.environ.get("VIX_ADMIN_TOKEN", "")
+admin_mode = bool(admin_token) and hmac.compare_digest(st.query_params.get("admin", "").encode(), admin_token.encode())
+profile_requested = admin_mode and bool(st.session_state.get("profile_reruns"))
+# Also stops a profiler this session left running when its last rerun was cut short
+# by an exception, st.stop() or st.rerun()
+rerun_profiler = start_rerun_profile(session_id, profile_requested)
+
 st.title("📊 Understanding VIX: Market's Fear Gauge")
 st.markdown("Analyze how VIX (Volatility Index) relates to market volatility and sentiment, and learn to interpret its signals.")
 
@@ -111,14 +379,74 @@ st.markdown("Analyze how VIX (Volatility Index) relates to market volatility and
 with st.sidebar:
     st.header("⚙️ Parameters")
     
-    st.button("↺ Reset Parameters", on_click=reset_parameters)
+    st.button(SCENARIO_PRESETS["default"]["label"], on_click=apply_preset, args=("default",))
 
-    recent_vol = st.slider("Recent Realized Volatility (%)", 5.0, 50.0, 12.0, key='recent_vol_slider')
-    vix = st.slider("Current VIX Level", 5.0, 50.0, 16.0, key='vix_slider')
-    mean_rev_speed = st.slider("Mean Reversion Speed", 0.1, 0.5, 0.25, 0.05, key='mean_rev_speed_slider')
-    mean_rev_level = st.slider("Mean Reversion Level (%)", 10.0, 25.0, 16.0, key='mean_rev_level_slider')
-    premium_factor = st.slider("Volatility Premium", 1.0, 6.0, 3.5, 0.5, key='premium_factor_slider')
-    prediction_days = st.slider("Forecast Horizon (days)", 10, 90, 30, 5, key='prediction_days_slider')
+    # Each slider commits once on release; batching holds every change until "Apply", so
+    # adjusting several parameters costs one rerun instead of one per slider
+    batch_edits = st.checkbox("Apply slider changes together", key="batch_slider_edits")
+    with st.form("model_parameters") if batch_edits else st.container():
+        defaults = SCENARIO_PRESETS["default"]["params"]
+        recent_vol = st.slider("Recent Realized Volatility (%)", 5.0, 50.0, defaults["recent_vol"], key='recent_vol_slider')
+        vix = st.slider("Current VIX Level", 5.0, 50.0, defaults["vix"], key='vix_slider')
+        mean_rev_speed = st.slider("Mean Reversion Speed", 0.1, 0.5, defaults["mean_rev_speed"], 0.05, key='mean_rev_speed_slider')
+        mean_rev_level = st.slider("Mean Reversion Level (%)", 10.0, 25.0, defaults["mean_rev_level"], key='mean_rev_level_slider')
+        premium_factor = st.slider("Volatility Premium", 1.0, 6.0, defaults["premium_factor"], 0.5, key='premium_factor_slider')
+        prediction_days = st.slider("Forecast Horizon (days)", 10, 90, defaults["prediction_days"], 5, key='prediction_days_slider')
+        if batch_edits:
+            st.form_submit_button("Apply")
+    
+    with st.expander("📥 Implied VIX from Option Quotes"):
+        quote_file = st.file_uploader("Option quotes (CSV)", type="csv",
+                                      help="Columns: expiry_days, strike, type (C/P), forward, price or bid/ask, optional rate")
+        quote_summary = None
+        if quote_file is not None:
+            try:
+                quote_summary = analyze_option_quotes(quote_file.getvalue())
+            except KeyError as e:
+                st.error(f"The option quotes have no {e} column")
+            except ValueError as e:
+                st.error(f"Could not read the option quotes: {e}")
+        if quote_summary is not None:
+            implied_vix = quote_summary["implied_vix"]
+            model_free_indices = ", ".join(
+                f"{days}d `{index:.2f}`" for days, index in quote_summary["indices"].items()
+            ) or "n/a"
+            st.markdown(f"""
+            - **Quotes:** `{quote_summary['n_quotes']}` ({quote_summary['n_converged']} converged, max `{quote_summary['max_iterations']}` iterations)
+            - **30-day ATM implied vol:** `{implied_vix:.2f}`
+            - **Model-free indices:** {model_free_indices}
+            """)
+            if np.isfinite(implied_vix):
+                st.button("Use as Current VIX", on_click=set_slider_value,
+                          args=("vix_slider", float(np.clip(round(implied_vix, 1), 5.0, 50.0))))
+    
+    with st.expander("📈 Data-Driven Premium"):
+        history_file = st.file_uploader("VIX history (CSV)", type="csv",
+                                        help="Columns: date, vix, close (underlying index level)")
+        if history_file is not None:
+            history_bytes = history_file.getvalue()
+        elif os.path.exists(HISTORY_FILE):
+            with open(HISTORY_FILE, "rb") as f:
+                history_bytes = f.read()
+        else:
+            history_bytes = None
+        
+        if history_bytes:
+            premium_window = st.select_slider("Realized vol window (days)", [10, 21, 42, 63], value=21)
+            premium_stats = get_premium_analytics(history_bytes).summary(premium_window)
+            current_regime = next(name for name, lo, hi in VIX_REGIMES if lo <= vix < hi)
+            st.markdown("| VIX Regime | Days | Median Premium |\n|---|---|---|\n" + "\n".join(
+                f"| {name} | {stats['count']} | {stats['q50']:.2f} |" if stats["count"] else f"| {name} | 0 | – |"
+                for name, stats in [("All", premium_stats["overall"])] + list(premium_stats["regimes"].items())
+            ))
+            for name, stats in [("All", premium_stats["overall"]), (current_regime, premium_stats["regimes"][current_regime])]:
+                if stats["count"]:
+                    st.button(f"Use {name} median ({stats['q50']:.2f})", key=f"premium_preset_{name}",
+                              on_click=set_slider_value,
+                              args=("premium_factor_slider", float(np.clip(round(stats["q50"] * 2) / 2, 1.0, 6.0))))
+        else:
+            st.caption(f"Upload a history file or place one at `{os.path.basename(HISTORY_FILE)}` next to the app "
+                       "to derive premium presets from VIX minus subsequently realized volatility.")
 
     # Disclaimer and license
     st.markdown("---")
@@ -148,6 +476,150 @@ with st.sidebar:
     </div>
     """, unsafe_allow_html=True)
 
+# Fragments: their own widgets rerun only them; the sidebar still reruns everything
+@st.fragment
+def render_option_analytics(expected_vix_value, vix, future_vol, mean_rev_level, mean_rev_speed, prediction_days):
+    with st.expander("🧾 VIX Option Analytics"):
+        st.markdown("""
+        Prices VIX options two ways: **Black-76** on the model's Expected VIX as the forward, and
+        **Monte Carlo** over the simulated VIX ensemble behind the projection above.
+        """)
+        opt_col1, opt_col2, opt_col3 = st.columns(3)
+        with opt_col1:
+            option_type = st.radio("Option Type", ["Call", "Put"], horizontal=True)
+        with opt_col2:
+            vol_of_vol = st.slider("VIX Option Volatility (%)", 30, 200, 90, 5) / 100
+        with opt_col3:
+            option_expiries = [d for d in (5, 10, 21, 42, 63) if d < prediction_days]
+            option_expiry = st.select_slider("Expiry (days)", option_expiries, value=option_expiries[-1])
+        
+        strikes = np.arange(max(5.0, np.floor(expected_vix_value) - 10), np.floor(expected_vix_value) + 21, 2.5)
+        greeks = black76_greeks(expected_vix_value, strikes, option_expiry / TRADING_DAYS, vol_of_vol,
+                                is_call=option_type == "Call")
+        # Same ensemble as compute_scenario_bundle's defaults (1000 paths, seed 0), already extended
+        extender = get_path_extender(vix, future_vol, mean_rev_level, mean_rev_speed, 1000, 0,
+                                     path_dtype=PATH_DTYPE.name)
+        ensemble_vix, _ = extender.paths(prediction_days)
+        mc_prices, mc_errors = monte_carlo_option_prices(ensemble_vix, strikes, [option_expiry],
+                                                         is_call=option_type == "Call")
+        st.dataframe({
+            "Strike": strikes,
+            "Black-76": greeks["price"],
+            "Monte Carlo": mc_prices[:, 0],
+            "MC Std Err": mc_errors[:, 0],
+            "Delta": greeks["delta"],
+            "Gamma": greeks["gamma"],
+            "Vega (per 1%)": greeks["vega"] / 100,
+            "Theta (per day)": greeks["theta"] / TRADING_DAYS,
+        }, hide_index=True)
+        st.caption("The simulated ensemble is not calibrated to the Black-76 volatility, so the two columns "
+                   "differ whenever the model's dynamics imply a different spread of future VIX levels.")
+
+@st.fragment
+def model_free_variance_lab():
+    with st.expander("🧮 Try It: Model-Free Variance vs. the CBOE Strike Sum"):
+        st.markdown("""
+        The VIX formula above is a discrete approximation of an integral over *all* strikes. Build a
+        volatility smile, then compare the CBOE sum over listed strikes with the integral over a dense,
+        interpolated strike grid.
+        """)
+        mf_col1, mf_col2 = st.columns(2)
+        with mf_col1:
+            mf_atm_vol = st.slider("ATM Implied Volatility (%)", 8, 60, 18) / 100
+            mf_skew = st.slider("Smile Skew (vol change per unit log-moneyness)", -1.0, 0.0, -0.4, 0.05)
+        with mf_col2:
+            mf_spacing = st.select_slider("Listed Strike Spacing (points)", [5, 25, 50, 100, 250], value=50)
+            mf_days = st.select_slider("Tenor (days)", [9, 30, 93], value=30)
+        
+        variance_demo = model_free_variance_demo(mf_atm_vol, mf_skew, mf_spacing, mf_days)
+        st.markdown(f"""
+        | Method | Index Level |
+        |--------|-------------|
+        | Exact integral (true smile, dense grid) | `{variance_demo['exact']:.3f}` |
+        | Spline-interpolated smile on dense grid | `{variance_demo['dense']:.3f}` |
+        | CBOE sum over {variance_demo['n_strikes']} listed strikes | `{variance_demo['cboe']:.3f}` |
+        """)
+        st.caption("Index levels are 100 × √variance for a forward of 5000. Wider strike spacing and steeper "
+                   "skew increase the CBOE sum's discretization error.")
+
+@st.fragment
+def multi_index_monitor():
+    with st.expander("🌐 Multi-Index Monitor: VIX, VXN, RVX, VSTOXX and more in one pass"):
+        st.markdown("""
+        Every volatility index in the table goes through the same model in one vectorized pass, and the
+        simulated paths share correlated daily shocks. Edit the rows, or add your own indices.
+        """)
+        registry = load_underlyings()
+        pd = lazy_import("pandas")
+        frame = pd.DataFrame.from_dict(registry["underlyings"], orient="index")[["label", *TABLE_FIELDS]]
+        frame = st.data_editor(frame, num_rows="dynamic", key="underlyings_table")
+        frame = frame.dropna(subset=list(TABLE_FIELDS))
+        
+        uni_col1, uni_col2, uni_col3 = st.columns(3)
+        with uni_col1:
+            uni_days = st.select_slider("Horizon (days)", [10, 21, 30, 63, 90], value=30, key="underlyings_days")
+        with uni_col2:
+            uni_paths = st.select_slider("Paths per index", [200, 500, 1000, 2000], value=1000, key="underlyings_paths")
+        with uni_col3:
+            uni_rho = st.slider("Correlation for unlisted pairs", 0.0, 0.95, registry["correlation"]["default"], 0.05)
+        if frame.empty:
+            st.caption("Add at least one index.")
+            return
+        
+        table = tuple((str(name), tuple(float(row[field]) for field in TABLE_FIELDS)) for name, row in frame.iterrows())
+        result = run_underlyings(table, uni_days, uni_paths, tuple(sorted(registry["correlation"]["pairs"].items())),
+                                 uni_rho)
+        model = result["model"]
+        st.dataframe({
+            "Index": result["names"],
+            "Expected Level": model["expected_level"],
+            "Deviation": model["deviation"],
+            "State": np.where(model["deviation"] > 5, "HIGH", np.where(model["deviation"] < -5, "LOW", "NORMAL")),
+            "Future Vol": model["future_vol"],
+            "Predicted Change": model["predicted_change"],
+            f"Mean Level in {uni_days}d": result["terminal_mean"],
+        }, hide_index=True)
+        
+        palette = ("darkorange", "darkblue", "green", "red", "purple", "brown", "teal", "gray")
+        scale = color_scale({name: palette[i % len(palette)] for i, name in enumerate(result["names"])})
+        st.altair_chart(layered_chart(
+            line_layer(line_frame(np.arange(uni_days), dict(zip(result["names"], result["index_quantiles"][:, 1]))),
+                       scale, "Days Forward", "Index Level"),
+            title="Median simulated path per index", height=300,
+        ))
+        st.caption("Realized correlation of simulated daily index changes:")
+        st.dataframe(pd.DataFrame(result["realized_correlation"], index=result["names"],
+                                  columns=result["names"]).round(2))
+
+@st.fragment
+def forecast_benchmark(history_bytes, mean_rev_level, mean_rev_speed, premium_factor):
+    with st.expander("🎯 Forecast Benchmark: how good is the heuristic?"):
+        if not history_bytes:
+            st.caption("Needs a VIX history file (see 📈 Data-Driven Premium in the sidebar).")
+            return
+        st.markdown("""
+        Scores the model's volatility prediction out of sample against **HAR-RV** regressions on daily,
+        weekly and monthly realized volatility (with and without VIX), the VIX itself, and a random walk.
+        Regressions are refit every day using only data available at the time.
+        """)
+        bench_col1, bench_col2 = st.columns(2)
+        with bench_col1:
+            bench_horizon = st.select_slider("Forecast horizon (days)", [5, 10, 21, 42, 63], value=21)
+        with bench_col2:
+            bench_windows = st.multiselect("Estimation windows (days)", [252, 504, 1008, 2520], default=[504, 1008])
+        
+        with stage_timer("forecast_evaluation"):
+            rows = get_forecast_evaluation(history_bytes, bench_horizon).evaluate(
+                tuple(bench_windows) + (None,), mean_rev_level=mean_rev_level,
+                mean_rev_speed=mean_rev_speed, premium_factor=premium_factor)
+        if rows:
+            st.dataframe(rows, hide_index=True)
+            st.caption(f"{rows[0]['observations']} common forecast dates, best QLIKE first. MSE is in squared "
+                       "vol points; QLIKE compares variances and penalizes under-prediction more. The heuristic "
+                       "uses the sidebar's mean reversion and premium settings.")
+        else:
+            st.caption("Not enough history for the selected windows.")
+
 # Create tabs for different sections
 tab1, tab2, tab3, tab4, tab5 = st.tabs([
     "🎮 Interactive Tool", 
@@ -158,13 +630,11 @@ tab1, tab2, tab3, tab4, tab5 = st.tabs([
 ])
 
 with tab1:
-    # Calculate predictions
-    mean_rev_adjustment = calculate_mean_reversion_adjustment(recent_vol, mean_rev_level, mean_rev_speed)
-    expected_vix_value = calculate_expected_vix(recent_vol, mean_rev_adjustment, premium_factor)
-    future_vol, predicted_change = predict_future_volatility(recent_vol, vix, expected_vix_value, mean_rev_adjustment)
-    
-    # Simulate a potential path for VIX
-    vix_path, vol_path = simulate_vix_path(vix, future_vol, prediction_days, mean_rev_level, mean_rev_speed)
+    # Calculate predictions (presets are precomputed at startup, everything else on first use)
+    warm_scenario_bundles(SCENARIO_PRESETS)
+    bundle = compute_scenario_bundle(recent_vol, vix, mean_rev_speed, mean_rev_level, premium_factor, prediction_days)
+    expected_vix_value = bundle["expected_vix"]
+    future_vol, predicted_change = bundle["future_vol"], bundle["predicted_change"]
     
     # VIX status determination
     vix_state = "NORMAL"
@@ -207,27 +677,9 @@ with tab1:
         """)
 
     with col2:
-        # Generate path simulation graph
-        fig, ax = plt.subplots(figsize=(10, 5))
-        days = list(range(prediction_days))
-        
-        ax.plot(days, vix_path, label='Projected VIX Path', color='darkorange', linewidth=2)
-        ax.plot(days, vol_path, label='Projected Realized Volatility Path', color='darkblue', linewidth=2, alpha=0.7)
-        
-        # Add current points
-        ax.scatter(0, vix_path[0], color='red', s=100, label='Current VIX')
-        ax.scatter(0, vol_path[0], color='blue', s=100, label='Current Realized Vol')
-        
-        # Add expected VIX
-        ax.axhline(y=expected_vix_value, linestyle='--', color='green', alpha=0.7, label='Expected VIX Level')
-        
-        ax.set_title(f"VIX and Volatility Projection for Next {prediction_days} Days", fontweight='bold')
-        ax.set_xlabel("Days Forward")
-        ax.set_ylabel("Volatility Level (%)")
-        ax.grid(alpha=0.3)
-        ax.legend()
-        
-        st.pyplot(fig)
+        render_start = time.perf_counter()
+        st.altair_chart(projection_chart(bundle, prediction_days))
+        record_stage("render", time.perf_counter() - render_start)
         
         # VIX Prediction Confidence
         st.warning("""
@@ -237,6 +689,10 @@ with tab1:
         
         As VIX measures expected volatility over the next 30 days, the prediction confidence is highest for the near term and decreases beyond that window.
         """)
+    
+    render_option_analytics(expected_vix_value, vix, future_vol, mean_rev_level, mean_rev_speed, prediction_days)
+    forecast_benchmark(history_bytes, mean_rev_level, mean_rev_speed, premium_factor)
+    multi_index_monitor()
 
 with tab2:
     st.markdown("""
@@ -331,6 +787,8 @@ with tab2:
         1. Higher future volatility
         2. A potential contrarian buying opportunity
         """)
+    
+    model_free_variance_lab()
 
 with tab3:
     st.markdown("""
@@ -369,18 +827,14 @@ with tab3:
     """)
 
     # Button row for scenario presets
-    col1, col2, col3, col4 = st.columns(4)
-    with col1:
-        st.button("Set Low Vol Environment", on_click=set_low_vol_parameters)
-    with col2:
-        st.button("Set High Vol Environment", on_click=set_high_vol_parameters)
-    with col3:
-        st.button("Set Fear Scenario", on_click=set_fear_parameters)
-    with col4:
-        st.button("Set Complacency Scenario", on_click=set_complacency_parameters)
+    scenario_names = [name for name in SCENARIO_PRESETS if name != "default"]
+    for col, name in zip(st.columns(len(scenario_names)), scenario_names):
+        with col:
+            st.button(SCENARIO_PRESETS[name]["label"], on_click=apply_preset, args=(name,))
 
 # Tab 4: Practical Labs
-with tab4:
+@st.fragment
+def practical_labs():
     st.header("🔬 Practical VIX Labs")
     st.markdown("""
     Welcome to the **Practical VIX Labs** section! Each lab provides a real-world scenario or demonstration 
@@ -539,6 +993,42 @@ with tab4:
         - Why does the VIX term structure typically slope upward during normal market conditions?
         - How might changes in the VIX term structure provide early warning of market regime changes?
         """)
+        
+        with st.expander("🧪 Roll Decay Simulator: VIX futures ETPs"):
+            st.markdown("""
+            Daily-rolled, constant-maturity VIX futures products (VXX/UVXY/SVXY-style) over thousands of
+            simulated VIX paths. In contango, the long products lose value to the roll even when spot VIX
+            goes nowhere; the short products collect that roll, but suffer in spikes.
+            """)
+            etp_col1, etp_col2 = st.columns(2)
+            with etp_col1:
+                etp_vix = st.slider("Starting VIX", 10.0, 50.0, 16.0, 1.0)
+                etp_premium = st.slider("Futures term premium (VIX points)", 0.0, 5.0, 2.0, 0.5,
+                                        help="How far the long end of the futures curve sits above the long-run VIX")
+            with etp_col2:
+                etp_years = st.select_slider("Horizon (years)", [1, 2, 3, 5], value=1)
+                etp_paths = st.select_slider("Scenarios", [1000, 2000, 5000, 10000], value=2000)
+            
+            etp = run_etp_simulation(etp_vix, etp_years, etp_paths, etp_premium)
+            st.metric("Annualized roll yield (spot unchanged)", f"{100 * etp['roll_yield_annual']:.1f}%",
+                      help=f"Long-run futures level {etp['curve_level']:.1f}")
+            scale = color_scale({label: color for label, color in zip(etp["products"], ("darkorange", "red", "teal", "darkblue"))})
+            st.altair_chart(layered_chart(
+                line_layer(line_frame(etp["quantile_days"], {label: np.maximum(product["nav_quantiles"][1], 1e-4)
+                                                             for label, product in etp["products"].items()}),
+                           scale, "Trading Days", "Median NAV (log scale)", y_scale="log"),
+                title=f"Median NAV of $1 over {etp_years} year(s), {etp_paths:,} scenarios",
+            ))
+            st.dataframe([{
+                "Product": label,
+                "Median NAV": product["terminal_median"],
+                "Mean NAV": product["terminal_mean"],
+                "P(loss)": product["prob_loss"],
+                "P(90% drawdown from peak)": product["prob_drawdown_90"],
+                "Median return p.a.": product["annualized_median_return"],
+            } for label, product in etp["products"].items()], hide_index=True)
+            st.caption("The futures curve mean-reverts to the long-run level at a fixed speed, the index rolls "
+                       "daily from the first to the second month, and leverage resets every day. Fees are 0.89% p.a.")
 
     # ---------------- Lab 5 ----------------
     else:  # lab_choice == "Lab 5: VIX and Market Returns"
@@ -572,7 +1062,11 @@ with tab4:
         - What market environments might cause this relationship to break down?
         """)
 
-with tab5:
+with tab4:
+    practical_labs()
+
+@st.fragment
+def playground():
     st.header("🧮 Playground: Interactive VIX Learning")
     
     st.markdown("""
@@ -606,8 +1100,8 @@ with tab5:
         with col1:
             st.markdown("### Market Configuration")
             
-            market_trend = st.radio("Market Trend", ["Bull Market", "Bear Market", "Sideways", "Crash"])
-            vol_regime = st.radio("Volatility Regime", ["Low", "Normal", "High", "Extreme"])
+            market_trend = st.radio("Market Trend", list(MARKET_TRENDS))
+            vol_regime = st.radio("Volatility Regime", list(VOL_REGIMES))
             event_probability = st.slider("Event Probability (%)", 0, 100, 10)
             simulation_days = st.slider("Simulation Days", 30, 252, 60)
             
@@ -617,71 +1111,35 @@ with tab5:
             st.markdown("### Simulation Results")
             
             if run_simulation:
-                # Set up simulation parameters based on selections
-                if market_trend == "Bull Market":
-                    base_vol = 10
-                    drift = -0.1
-                elif market_trend == "Bear Market":
-                    base_vol = 20
-                    drift = 0.1
-                elif market_trend == "Sideways":
-                    base_vol = 15
-                    drift = 0
-                else:  # Crash
-                    base_vol = 35
-                    drift = 0.3
-                
-                if vol_regime == "Low":
-                    vol_multiplier = 0.7
-                elif vol_regime == "Normal":
-                    vol_multiplier = 1.0
-                elif vol_regime == "High":
-                    vol_multiplier = 1.5
-                else:  # Extreme
-                    vol_multiplier = 2.5
-                
-                # Generate simulation
-                days = list(range(simulation_days))
-                
-                # Starting values
-                start_vol = base_vol * vol_multiplier
-                start_vix = start_vol + 4 + (2 * np.random.randn())
-                
-                # Create paths with randomness
-                vol_path = [start_vol]
-                vix_path = [start_vix]
-                
-                for i in range(1, simulation_days):
-                    # Check for random events
-                    event = np.random.rand() < (event_probability / 100)
-                    event_multiplier = 1.5 if event else 1.0
-                    
-                    # Update volatility with mean reversion, drift, and randomness
-                    vol_noise = np.random.normal(0, 0.1 * vol_path[-1])
-                    mean_rev = 0.05 * (15 - vol_path[-1])
-                    new_vol = max(5, vol_path[-1] + mean_rev + drift + vol_noise)
-                    new_vol *= event_multiplier
-                    vol_path.append(new_vol)
-                    
-                    # VIX follows volatility with a premium and some noise
-                    vix_premium = 3.5 + 0.5 * np.random.randn()
-                    vix_noise = np.random.normal(0, 0.15 * vix_path[-1])
-                    new_vix = max(5, new_vol + vix_premium + vix_noise)
-                    new_vix *= event_multiplier
-                    vix_path.append(new_vix)
+                # Generate simulation; the paths live in the shared array store, the session keeps the key
+                market_sim_start = time.perf_counter()
+                vix_paths, vol_paths = simulate_market_paths(market_trend, vol_regime, event_probability, simulation_days)
+                record_stage("market_simulation", time.perf_counter() - market_sim_start)
+                increment("paths_simulated")
+                st.session_state["market_sim"] = {
+                    "key": array_store.put(session_id, "market_sim", {"vix": vix_paths[0], "vol": vol_paths[0]}),
+                    "trend": market_trend,
+                    "regime": vol_regime,
+                    "event_probability": event_probability,
+                    "days": simulation_days,
+                }
+            
+            market_sim = st.session_state.get("market_sim")
+            market_sim_arrays = array_store.get(market_sim["key"]) if market_sim else None
+            if market_sim_arrays is not None:
+                sim_trend, sim_regime = market_sim["trend"], market_sim["regime"]
+                vix_path, vol_path = market_sim_arrays["vix"], market_sim_arrays["vol"]
+                days = np.arange(len(vix_path))
                 
                 # Plot the results
-                fig, ax = plt.subplots(figsize=(10, 6))
-                ax.plot(days, vix_path, label='VIX', color='darkorange', linewidth=2)
-                ax.plot(days, vol_path, label='Realized Volatility', color='darkblue', linewidth=2, alpha=0.7)
-                
-                ax.set_title(f"{market_trend} with {vol_regime} Volatility Simulation", fontweight='bold')
-                ax.set_xlabel("Days")
-                ax.set_ylabel("Volatility Level (%)")
-                ax.grid(alpha=0.3)
-                ax.legend()
-                
-                st.pyplot(fig)
+                render_start = time.perf_counter()
+                scale = color_scale({"VIX": "darkorange", "Realized Volatility": "darkblue"})
+                st.altair_chart(layered_chart(
+                    line_layer(line_frame(days, {"VIX": vix_path, "Realized Volatility": vol_path}),
+                               scale, "Days", "Volatility Level (%)"),
+                    title=f"{sim_trend} with {sim_regime} Volatility Simulation",
+                ))
+                record_stage("render", time.perf_counter() - render_start)
                 
                 # Key statistics
                 avg_vix = np.mean(vix_path)
@@ -703,18 +1161,82 @@ with tab5:
                 st.info(f"""
                 **Key Insights:**
                 
-                In this {market_trend.lower()} scenario with {vol_regime.lower()} volatility:
+                In this {sim_trend.lower()} scenario with {sim_regime.lower()} volatility:
                 
                 {
-                    "VIX maintains a relatively low level with small volatility premium. Occasional spikes may still occur with the specified event probability." if market_trend == "Bull Market" else
-                    "VIX shows elevated levels with a higher volatility premium due to market uncertainty and downside protection demand." if market_trend == "Bear Market" else
-                    "VIX fluctuates around a moderate level with typical volatility premium. Directionless markets can sometimes create their own uncertainty." if market_trend == "Sideways" else
+                    "VIX maintains a relatively low level with small volatility premium. Occasional spikes may still occur with the specified event probability." if sim_trend == "Bull Market" else
+                    "VIX shows elevated levels with a higher volatility premium due to market uncertainty and downside protection demand." if sim_trend == "Bear Market" else
+                    "VIX fluctuates around a moderate level with typical volatility premium. Directionless markets can sometimes create their own uncertainty." if sim_trend == "Sideways" else
                     "VIX spikes dramatically, reflecting extreme fear. The volatility premium often expands significantly during crash scenarios as demand for protection surges."
                 }
                 """)
+                
+                with st.expander("⚠️ Tail Risk across many simulated paths"):
+                    risk_col1, risk_col2 = st.columns(2)
+                    with risk_col1:
+                        risk_paths = st.select_slider("Paths", [1000, 5000, 20000, 50000], value=5000)
+                    with risk_col2:
+                        risk_thresholds = st.multiselect("VIX thresholds", [15, 20, 25, 30, 40, 50, 60, 80],
+                                                         default=list(DEFAULT_THRESHOLDS))
+                    if risk_thresholds:
+                        risk = run_market_risk(sim_trend, sim_regime,
+                                               market_sim.get("event_probability", event_probability),
+                                               market_sim.get("days", len(vix_path)), risk_paths,
+                                               tuple(sorted(risk_thresholds)))
+                        st.dataframe([{
+                            "Threshold": threshold,
+                            "P(VIX reaches it)": stats["prob_exceed"],
+                            "Median days to first touch": stats["median_days_to_first"],
+                            "Mean days, given touched": stats["mean_days_to_first_given_hit"],
+                        } for threshold, stats in risk["thresholds"].items()], hide_index=True)
+                        
+                        scale = color_scale({f"VIX ≥ {t}": color for t, color in
+                                             zip(risk["thresholds"], ("gold", "orange", "darkorange", "red", "darkred",
+                                                                      "purple", "indigo", "black"))})
+                        st.altair_chart(layered_chart(
+                            line_layer(line_frame(np.arange(risk["days"]),
+                                                  {f"VIX ≥ {t}": stats["first_passage_cdf"]
+                                                   for t, stats in risk["thresholds"].items()}),
+                                       scale, "Days", "Probability"),
+                            title="Probability that VIX has touched each threshold by day N", height=280,
+                        ))
+                        
+                        st.dataframe([{
+                            "Horizon (days)": horizon,
+                            **{f"VaR {int(100 * level)}%": stats["var"] for level, stats in levels.items()},
+                            **{f"ES {int(100 * level)}%": stats["es"] for level, stats in levels.items()},
+                        } for horizon, levels in risk["var_es"].items()], hide_index=True)
+                        st.markdown(f"""
+                        - Max drawdown from a peak: median `{risk['drawdown']['median']:.1f}` points
+                          (`{100 * risk['drawdown_pct']['median']:.0f}%`), 95th percentile `{risk['drawdown']['p95']:.1f}`
+                        - Max spike from a trough: median `{100 * risk['spike_pct']['median']:.0f}%`,
+                          95th percentile `{100 * risk['spike_pct']['p95']:.0f}%`
+                        - Peak VIX: median `{risk['peak']['median']:.1f}`, 95th percentile `{risk['peak']['p95']:.1f}`
+                        """)
+                        st.caption("VaR/ES are of VIX point rises over each horizon (the loss side for short "
+                                   "volatility). Paths are simulated in blocks and reduced into fixed-size "
+                                   "quantile sketches (within 0.2%), so memory does not grow with the path count.")
             
             else:
                 st.info("Click 'Run Simulation' to see results")
+        
+        with st.expander("🔀 Parameter Sweep: every trend × regime × event probability"):
+            st.markdown("""
+            Instead of clicking through combinations one at a time, evaluate the whole grid in one batch.
+            Each scenario is averaged over many simulated paths and summarized at several horizons.
+            """)
+            sweep_col1, sweep_col2 = st.columns(2)
+            with sweep_col1:
+                sweep_step = st.select_slider("Event probability step (%)", [5, 10, 20, 25], value=10)
+                sweep_paths = st.select_slider("Paths per scenario", [50, 100, 200, 500], value=200)
+            with sweep_col2:
+                sweep_horizons = st.multiselect("Horizons (days)", [30, 63, 126, 189, 252], default=[30, 63, 126, 252])
+                sweep_metric = st.selectbox("Chart metric", ["avg_vix", "avg_premium", "mean_max_vix", "p95_max_vix"])
+            
+            if st.button("Run Sweep") and sweep_horizons:
+                sweep = run_market_sweep(sweep_step, sweep_paths, tuple(sorted(sweep_horizons)))
+                st.dataframe(sweep["rows"], hide_index=True)
+                st.altair_chart(render_sweep_chart(sweep["rows"], sweep_metric))
     
     elif activity == "Historical VIX Patterns":
         st.subheader("Historical VIX Patterns")
@@ -772,70 +1294,34 @@ with tab5:
         {event['description']}
         """)
         
-        # Simulate the VIX pattern for the event
+        # Simulate the VIX pattern for the event: one highlighted path plus an envelope
         days_before = 20
-        days_after = event['days_to_normalize'] + 20
-        
-        # Make sure arrays will have matching lengths
-        days = list(range(-days_before, event['days_to_peak'] + days_after))
-        vix_values = []
-        
-        # Pre-event period
-        for i in range(days_before):
-            random_factor = 0.05 * event['pre_vix'] * np.random.randn()
-            vix_values.append(event['pre_vix'] + random_factor)
-        
-        # Event buildup to peak
-        for i in range(event['days_to_peak']):
-            progress = (i + 1) / event['days_to_peak']
-            current_vix = event['pre_vix'] + progress * (event['peak_vix'] - event['pre_vix'])
-            random_factor = 0.07 * current_vix * np.random.randn()
-            vix_values.append(current_vix + random_factor)
-        
-        # Event cool down period
-        for i in range(days_after):
-            progress = min(1, (i + 1) / event['days_to_normalize'])
-            current_vix = event['peak_vix'] - progress * (event['peak_vix'] - event['post_vix'])
-            random_factor = 0.1 * current_vix * np.random.randn()
-            vix_values.append(current_vix + random_factor)
-            
-        # Ensure arrays have same length
-        assert len(days) == len(vix_values), f"Length mismatch: days={len(days)}, vix_values={len(vix_values)}"
+        envelope = compute_event_envelope(event['pre_vix'], event['peak_vix'], event['post_vix'],
+                                          event['days_to_peak'], event['days_to_normalize'],
+                                          EVENT_REALIZATIONS, days_before)
+        days, vix_values = envelope["days"], envelope["path"]
         
         # Plot the event
-        fig, ax = plt.subplots(figsize=(12, 6))
-        
-        # Mark the event date and peak
-        ax.axvline(x=0, color='r', linestyle='--', alpha=0.7, label='Event Start')
-        ax.axvline(x=event['days_to_peak'], color='darkred', linestyle='--', alpha=0.7, label='VIX Peak')
-        
-        ax.plot(days, vix_values, color='darkorange', linewidth=2.5)
-        
-        # Annotations
-        ax.annotate('Pre-Event', xy=(-days_before/2, event['pre_vix']), 
-                   xytext=(-days_before/2, event['pre_vix'] + 10),
-                   arrowprops=dict(facecolor='black', shrink=0.05, width=1.5, headwidth=8),
-                   ha='center')
-        
-        ax.annotate('Peak Fear', xy=(event['days_to_peak'], event['peak_vix']), 
-                   xytext=(event['days_to_peak'] - 5, event['peak_vix'] + 15),
-                   arrowprops=dict(facecolor='black', shrink=0.05, width=1.5, headwidth=8),
-                   ha='center')
-        
-        ax.annotate('Normalization', xy=(event['days_to_peak'] + event['days_to_normalize']/2, 
-                                       (event['peak_vix'] + event['post_vix'])/2), 
-                   xytext=(event['days_to_peak'] + event['days_to_normalize']/2 - 5, 
-                          (event['peak_vix'] + event['post_vix'])/2 + 15),
-                   arrowprops=dict(facecolor='black', shrink=0.05, width=1.5, headwidth=8),
-                   ha='center')
-        
-        ax.set_title(f"VIX Pattern During {selected_event}", fontweight='bold', fontsize=14)
-        ax.set_xlabel("Days Relative to Event Start")
-        ax.set_ylabel("VIX Level")
-        ax.grid(alpha=0.3)
-        ax.legend()
-        
-        st.pyplot(fig)
+        render_start = time.perf_counter()
+        range_label = f'Range of {EVENT_REALIZATIONS} Simulated Paths'
+        scale = color_scale({'Simulated VIX': 'darkorange', range_label: 'orange',
+                             'Event Start': 'red', 'VIX Peak': 'darkred'})
+        
+        # Mark the event date and peak, then annotate the phases
+        st.altair_chart(layered_chart(
+            band_layer(band_frame(days, envelope["lower"], envelope["upper"]), range_label, scale),
+            line_layer(line_frame(days, {'Simulated VIX': vix_values}), scale,
+                       "Days Relative to Event Start", "VIX Level", stroke_width=2.5),
+            rule_layer('Event Start', scale, x=0),
+            rule_layer('VIX Peak', scale, x=event['days_to_peak']),
+            text_layer(
+                [-days_before / 2, event['days_to_peak'], event['days_to_peak'] + event['days_to_normalize'] / 2],
+                [event['pre_vix'], event['peak_vix'], (event['peak_vix'] + event['post_vix']) / 2],
+                ['Pre-Event', 'Peak Fear', 'Normalization'],
+            ),
+            title=f"VIX Pattern During {selected_event}", height=420,
+        ))
+        record_stage("render", time.perf_counter() - render_start)
         
         # Key insights about this event
         st.markdown(f"""
@@ -1156,7 +1642,7 @@ with tab5:
                     st.session_state.current_question += 1
                     st.session_state.answer_shown = False
                     st.session_state.question_scored = False
-                    st.rerun()
+                    rerun_fragment()
             
         else:
             # Quiz completed
@@ -1176,7 +1662,10 @@ with tab5:
                 st.session_state.quiz_score = 0
                 st.session_state.questions_answered = 0
                 st.session_state.current_question = 0
-                st.rerun()
+                rerun_fragment()
+
+with tab5:
+    playground()
 
 # Modern UI-style disclaimer (Bootstrap-like "alert-danger")
 st.markdown("""
@@ -1207,4 +1696,60 @@ st.markdown("""
       engage in volatility trading.</li>
   </ul>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+# Rendered last so it includes imports triggered while building the tabs
+with st.sidebar:
+    with st.expander("⏱️ Startup timings"):
+        st.markdown("\n".join(
+            f"- `{name}`: {elapsed_ms:.0f} ms ({modules} modules)"
+            for name, (elapsed_ms, modules) in IMPORT_TIMINGS.items()
+        ) or "No heavy imports recorded yet.")
+        st.caption("First import of each module in this process. For a full breakdown run "
+                   "`python -X importtime -c \"import vix_model\"`.")
+
+record_stage("rerun", time.perf_counter() - rerun_start)
+if rerun_profiler is not None:
+    finish_rerun_profile(rerun_profiler)
+    st.session_state["last_rerun_profile"] = profile_summary(rerun_profiler)
+
+if admin_mode:
+    with st.sidebar:
+        with st.expander("🛠️ Admin: Performance", expanded=True):
+            st.checkbox("Profile each rerun (cProfile)", key="profile_reruns")
+            if profile_requested and rerun_profiler is None:
+                st.caption("Another session is profiling; this rerun was not profiled.")
+            
+            result_cache = shared_cache()
+            snapshot = metrics_snapshot({"cache_hits": result_cache.hits, "cache_misses": result_cache.misses})
+            st.markdown("**Stages**")
+            st.table([
+                {"stage": name, "calls": stats["calls"],
+                 "avg ms": 1000 * stats["total_seconds"] / stats["calls"],
+                 "max ms": 1000 * stats["max_seconds"]}
+                for name, stats in snapshot["stages"].items()
+            ])
+            st.markdown("**Counters**")
+            st.json(snapshot["counters"])
+            
+            st.markdown("**Memory**")
+            store_stats = array_store.stats()
+            st.json({
+                "array_store_sessions": store_stats["sessions"],
+                "array_store_bytes": store_stats["total_bytes"],
+                "this_session_store_bytes": array_store.session_bytes(session_id),
+                "this_session_state_bytes": session_state_bytes(),
+            })
+            
+            if "last_rerun_profile" in st.session_state:
+                st.markdown("**Last profiled rerun**")
+                st.code(st.session_state["last_rerun_profile"], language=None)
+            
+            metrics_name = st.text_input("Export file name", "vix_metrics.json",
+                                         help="Written to the VIX_METRICS_DIR directory. Use a .prom or .txt "
+                                              "extension for Prometheus text format.")
+            if st.button("Export metrics"):
+                try:
+                    st.success(f"Wrote {export_metrics(metrics_export_path(metrics_name), snapshot)}")
+                except ValueError as e:
+                    st.error(str(e))
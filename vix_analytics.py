@@ -0,0 +1,109 @@
+import numpy as np
+
+TRADING_DAYS = 252
+
+# VIX level bands from the Theory tab's interpretation table
+VIX_REGIMES = (
+    ("Low (<12)", 0, 12),
+    ("Normal (12-20)", 12, 20),
+    ("Elevated (20-30)", 20, 30),
+    ("High (>30)", 30, np.inf),
+)
+
+def load_vix_history(path):
+    """Read a local daily history CSV (path or file object) with date, vix and close columns.
+    
+    close is the underlying index level (e.g. the S&P 500); rows are sorted
+    by date and rows missing either value are dropped.
+    """
+    import pandas as pd
+    history = pd.read_csv(path)
+    history.columns = [c.strip().lower() for c in history.columns]
+    history = history.dropna(subset=["vix", "close"])
+    if "date" in history:
+        history["date"] = pd.to_datetime(history["date"])
+        history = history.sort_values("date")
+    return {
+        "date": history["date"].to_numpy() if "date" in history else np.arange(len(history)),
+        "vix": history["vix"].to_numpy(dtype=float),
+        "close": history["close"].to_numpy(dtype=float),
+    }
+
+def _prefix_sums(values):
+    return np.concatenate([[0.0], np.cumsum(values)])
+
+def rolling_sum(values, window):
+    """Trailing sum over window observations in O(n) via prefix sums; NaN until the window fills"""
+    sums = _prefix_sums(values)
+    result = np.full(len(values), np.nan)
+    result[window - 1:] = sums[window:] - sums[:-window]
+    return result
+
+def rolling_mean(values, window):
+    """Trailing mean over window observations, see rolling_sum"""
+    return rolling_sum(values, window) / window
+
+class PremiumAnalytics:
+    """Implied-minus-realized volatility premium over one price history.
+    
+    The squared log returns are turned into a prefix-sum array once.
+    After that, the forward realized vol for any window length is O(n),
+    and each window's results are cached on the instance.
+    """
+    
+    def __init__(self, vix, close):
+        self.vix = np.asarray(vix, dtype=float)
+        returns = np.diff(np.log(np.asarray(close, dtype=float)))
+        self._squared_sums = _prefix_sums(returns ** 2)
+        self._cache = {}
+    
+    def forward_realized_vol(self, window):
+        """Annualized realized vol (in %) over the window trading days after each date"""
+        key = ("realized", window)
+        if key not in self._cache:
+            n = self.vix.size
+            realized = np.full(n, np.nan)
+            # Returns after date t are returns[t:t + window], i.e. prefix indices t .. t + window
+            end = n - window
+            if end > 0:
+                variance = (self._squared_sums[window:window + end] - self._squared_sums[:end]) / window
+                realized[:end] = 100 * np.sqrt(TRADING_DAYS * variance)
+            self._cache[key] = realized
+        return self._cache[key]
+    
+    def premium(self, window=21):
+        """VIX minus the volatility subsequently realized over window days"""
+        key = ("premium", window)
+        if key not in self._cache:
+            self._cache[key] = self.vix - self.forward_realized_vol(window)
+        return self._cache[key]
+    
+    def summary(self, window=21, rolling_window=252, quantiles=(0.05, 0.25, 0.5, 0.75, 0.95)):
+        """Distribution of the premium overall and by VIX regime, plus its rolling mean"""
+        key = ("summary", window, rolling_window, tuple(quantiles))
+        if key in self._cache:
+            return self._cache[key]
+        
+        premium = self.premium(window)
+        valid = ~np.isnan(premium)
+        
+        def describe(values):
+            if values.size == 0:
+                return {"count": 0}
+            stats = {"count": int(values.size), "mean": float(values.mean()), "std": float(values.std()),
+                     "share_positive": float((values > 0).mean())}
+            stats.update({f"q{int(100 * q):02d}": float(v) for q, v in zip(quantiles, np.quantile(values, quantiles))})
+            return stats
+        
+        summary = {
+            "window": window,
+            "overall": describe(premium[valid]),
+            "regimes": {name: describe(premium[valid & (self.vix >= lo) & (self.vix < hi)])
+                        for name, lo, hi in VIX_REGIMES},
+        }
+        # Rolling mean over the dates whose forward window is complete
+        with np.errstate(invalid="ignore", divide="ignore"):
+            summary["rolling_mean"] = (rolling_sum(np.where(valid, premium, 0.0), rolling_window)
+                                       / rolling_sum(valid.astype(float), rolling_window))
+        self._cache[key] = summary
+        return summary
@@ -0,0 +1,253 @@
+import functools
+import glob
+import hashlib
+import inspect
+import io
+import json
+import os
+import threading
+import zipfile
+from collections import OrderedDict
+
+import numpy as np
+
+_CACHE_FILE_EXTENSION = ".npz"
+# Everything a cached result can depend on besides the function itself: the vix_* modules
+# (model core, ETPs, tail risk, underlyings, options, ...) and the JSON registries
+_DEPENDENCY_PATTERNS = ("vix_*.py", "*.json")
+
+@functools.lru_cache(maxsize=1)
+def _dependency_hash():
+    """One hash over every dependency file; any deploy that changes one invalidates all keys"""
+    directory = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256()
+    for path in sorted(p for pattern in _DEPENDENCY_PATTERNS for p in glob.glob(os.path.join(directory, pattern))):
+        digest.update(os.path.basename(path).encode("utf-8") + b"\0")
+        with open(path, "rb") as f:
+            digest.update(hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+def code_version(func):
+    """Hash of a function's source plus every module and registry it may depend on"""
+    try:
+        source = inspect.getsource(func).encode("utf-8")
+    except (OSError, TypeError):
+        source = func.__code__.co_code
+    return hashlib.sha256(source + _dependency_hash().encode("ascii")).hexdigest()[:16]
+
+def canonical_key(namespace, version, params):
+    """Content address for a result: namespace, code version and parameters, hashed canonically"""
+    payload = json.dumps({"namespace": namespace, "version": version, "params": params},
+                         sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _encode(value, arrays):
+    """JSON-able description of value; arrays and numpy scalars go to the arrays list by index"""
+    if value is None or isinstance(value, (bool, int, float, str)) and not isinstance(value, np.generic):
+        return value
+    if isinstance(value, (np.ndarray, np.generic)):
+        array = np.asarray(value)
+        if array.dtype.hasobject:
+            raise TypeError("object arrays need pickle")
+        arrays.append(array)
+        return {"array" if isinstance(value, np.ndarray) else "scalar": len(arrays) - 1}
+    if isinstance(value, list):
+        return [_encode(item, arrays) for item in value]
+    if isinstance(value, tuple):
+        return {"tuple": [_encode(item, arrays) for item in value]}
+    if isinstance(value, dict):
+        return {"dict": [[_encode(k, arrays), _encode(v, arrays)] for k, v in value.items()]}
+    raise TypeError(f"cannot store {type(value).__name__} without pickle")
+
+def _decode(obj, arrays):
+    if isinstance(obj, list):
+        return [_decode(item, arrays) for item in obj]
+    if not isinstance(obj, dict):
+        return obj
+    if "array" in obj:
+        return arrays[f"a{obj['array']}"]
+    if "scalar" in obj:
+        return arrays[f"a{obj['scalar']}"][()]
+    if "tuple" in obj:
+        return tuple(_decode(item, arrays) for item in obj["tuple"])
+    return {_decode(k, arrays): _decode(v, arrays) for k, v in obj["dict"]}
+
+def dump_result(value):
+    """Serialize a cached result to .npz bytes; TypeError for values that would need pickle"""
+    arrays = []
+    structure = json.dumps(_encode(value, arrays))
+    buffer = io.BytesIO()
+    np.savez(buffer, structure=np.array(structure), **{f"a{i}": array for i, array in enumerate(arrays)})
+    return buffer.getvalue()
+
+def load_result(path):
+    """Read a result written by dump_result; never unpickles, so a planted file cannot run code"""
+    with np.load(path, allow_pickle=False) as arrays:
+        arrays = {name: arrays[name] for name in arrays.files}
+    return _decode(json.loads(str(arrays.pop("structure"))), arrays)
+
+class ResultCache:
+    """Thread-safe LRU cache of model outputs, optionally persisted as one .npz file per key.
+    
+    The in-memory layer holds at most max_entries results. The disk layer is
+    bounded by max_bytes and evicts least-recently-used files first. On
+    startup it indexes whatever an earlier process left in the directory,
+    so a restarted replica starts warm. The lock only guards the in-memory
+    indexes; file reads, writes and (de)serialization happen outside it.
+    """
+    
+    def __init__(self, directory=None, max_entries=256, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._disk = OrderedDict()  # key -> file size, least recently used first
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self._index_directory()
+    
+    def _path(self, key):
+        return os.path.join(self.directory, key + _CACHE_FILE_EXTENSION)
+    
+    def _index_directory(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(_CACHE_FILE_EXTENSION):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, name[:-len(_CACHE_FILE_EXTENSION)], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._disk[key] = size
+        self._remove_files(self._evict_disk())
+    
+    def _evict_disk(self):
+        """Drop least recently used keys from the disk index until it fits; returns them (call under the lock)"""
+        total = sum(self._disk.values())
+        evicted = []
+        while self._disk and total > self.max_bytes:
+            key, size = self._disk.popitem(last=False)
+            total -= size
+            evicted.append(key)
+        return evicted
+    
+    def _remove_files(self, keys):
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+    
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+    
+    def get(self, key):
+        """Return (found, value), checking memory first and then disk"""
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return True, self._memory[key]
+            on_disk = key in self._disk
+        if on_disk:
+            try:
+                value = load_result(self._path(key))
+            except (OSError, EOFError, ValueError, KeyError, TypeError, zipfile.BadZipFile):
+                # Another replica evicted it, or the file is truncated or not ours; treat as a miss
+                with self._lock:
+                    self._disk.pop(key, None)
+            else:
+                try:
+                    os.utime(self._path(key))
+                except OSError:
+                    pass  # evicted since the read; the value is still good
+                with self._lock:
+                    if key in self._disk:
+                        self._disk.move_to_end(key)
+                    self._remember(key, value)
+                    self.hits += 1
+                return True, value
+        with self._lock:
+            self.misses += 1
+        return False, None
+    
+    def set(self, key, value):
+        with self._lock:
+            self._remember(key, value)
+        if not self.directory:
+            return
+        try:
+            data = dump_result(value)
+        except (TypeError, ValueError):
+            return  # kept in memory only
+        if len(data) > self.max_bytes:
+            return
+        # Write then rename so concurrent readers never see a partial file
+        tmp_path = self._path(key) + f".{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            # Disk full or directory gone: the result stays in memory only
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            self._disk[key] = len(data)
+            self._disk.move_to_end(key)
+            evicted = self._evict_disk()
+        self._remove_files(evicted)
+    
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            keys = list(self._disk)
+            self._disk.clear()
+        self._remove_files(keys)
+    
+    def memoize(self, func):
+        """Decorator: cache func's results under a canonical hash of its bound arguments.
+        
+        Cached values are shared between callers (and sessions), so treat them
+        as read-only. Only None, numbers, strings, numpy arrays and scalars, and
+        lists, tuples and dicts of those reach the disk layer; anything else is
+        cached in memory only.
+        """
+        signature = inspect.signature(func)
+        version = code_version(func)
+        namespace = f"{func.__module__}.{func.__qualname__}"
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = canonical_key(namespace, version, dict(bound.arguments))
+            found, value = self.get(key)
+            if not found:
+                value = func(*args, **kwargs)
+                self.set(key, value)
+            return value
+        
+        wrapper.cache = self
+        return wrapper
+
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+def shared_cache():
+    """Process-wide ResultCache, configured from VIX_CACHE_DIR / VIX_CACHE_MAX_MB"""
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = ResultCache(
+                directory=os.environ.get("VIX_CACHE_DIR") or None,
+                max_bytes=int(float(os.environ.get("VIX_CACHE_MAX_MB", "256")) * 1024 * 1024),
+            )
+        return _shared_cache
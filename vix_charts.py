@@ -0,0 +1,112 @@
+"""Client-side charts: compact float32 series rendered by Vega-Lite in the browser.
+
+Instead of rasterizing a PNG on the server for every chart, the app sends
+the data and a small Vega-Lite spec. Long series are decimated first. Lines
+keep their shape via Largest-Triangle-Three-Buckets (LTTB). Envelopes keep
+their extremes via a min/max per bucket. Either way, a chart never carries
+more than about MAX_POINTS points per series, however long the ensemble.
+"""
+import numpy as np
+
+from vix_metrics import lazy_import
+
+MAX_POINTS = 400  # about one point per two pixels of a full-width chart
+
+def lttb_indices(y, n_out, x=None):
+    """Indices of the n_out points that best preserve the visual shape of y (LTTB); first and last are always kept"""
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    x = np.arange(n, dtype=float) if x is None else np.asarray(x, dtype=float)
+
+    # n_out - 2 buckets between the fixed end points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    selected = np.empty(n_out, dtype=int)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        x_c, y_c = x[next_lo:next_hi].mean(), y[next_lo:next_hi].mean()
+        # Twice the area of the triangle (selected point, candidate, next bucket's mean)
+        area = np.abs((x[a] - x_c) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (y_c - y[a]))
+        a = lo + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+def line_frame(x, series, max_points=MAX_POINTS):
+    """Wide float32 frame with column "x" and one column per series, decimated with LTTB.
+
+    Each series is decimated independently and the union of the chosen
+    indices is kept, so every series keeps its own peaks and troughs.
+    """
+    pd = lazy_import("pandas")
+    x = np.asarray(x)
+    keep = np.unique(np.concatenate([lttb_indices(values, max_points, x) for values in series.values()]))
+    frame = {"x": x[keep].astype(np.float32)}
+    frame.update({name: np.asarray(values, dtype=np.float32)[keep] for name, values in series.items()})
+    return pd.DataFrame(frame)
+
+def band_frame(x, lower, upper, max_points=MAX_POINTS):
+    """Float32 frame (x, lower, upper) with the envelope widened to the min/max of each bucket"""
+    pd = lazy_import("pandas")
+    x, lower, upper = np.asarray(x), np.asarray(lower), np.asarray(upper)
+    if len(x) > max_points:
+        starts = np.linspace(0, len(x), max_points, endpoint=False).astype(int)
+        x = x[starts]
+        lower, upper = np.minimum.reduceat(lower, starts), np.maximum.reduceat(upper, starts)
+    return pd.DataFrame({"x": x.astype(np.float32), "lower": lower.astype(np.float32),
+                         "upper": upper.astype(np.float32)})
+
+def color_scale(colors):
+    """One shared legend for every layer: label -> color"""
+    alt = lazy_import("altair")
+    return alt.Scale(domain=list(colors), range=list(colors.values()))
+
+def line_layer(frame, scale, x_title, y_title, stroke_width=2, y_scale="linear"):
+    """Every non-"x" column of a line_frame as a line, colored by column name"""
+    alt = lazy_import("altair")
+    names = [column for column in frame.columns if column != "x"]
+    return alt.Chart(frame).transform_fold(names, as_=["series", "value"]).mark_line(strokeWidth=stroke_width).encode(
+        x=alt.X("x:Q", title=x_title),
+        y=alt.Y("value:Q", title=y_title, scale=alt.Scale(zero=False, type=y_scale)),
+        color=alt.Color("series:N", scale=scale, title=None),
+        tooltip=[alt.Tooltip("x:Q", title=x_title), "series:N", alt.Tooltip("value:Q", format=".2f")],
+    )
+
+def band_layer(frame, label, scale, opacity=0.15):
+    alt = lazy_import("altair")
+    return alt.Chart(frame.assign(label=label)).mark_area(opacity=opacity).encode(
+        x="x:Q", y="lower:Q", y2="upper:Q", color=alt.Color("label:N", scale=scale, title=None),
+    )
+
+def rule_layer(label, scale, x=None, y=None):
+    """Dashed reference line at a fixed x (vertical) or y (horizontal)"""
+    alt = lazy_import("altair")
+    pd = lazy_import("pandas")
+    field = "x" if x is not None else "y"
+    frame = pd.DataFrame({field: [x if x is not None else y], "label": [label]})
+    return alt.Chart(frame).mark_rule(strokeDash=[6, 4], strokeWidth=1.5).encode(
+        **{field: f"{field}:Q"}, color=alt.Color("label:N", scale=scale, title=None))
+
+def point_layer(x, y, labels, scale, size=100):
+    """Highlighted points; each label appears in the shared legend"""
+    alt = lazy_import("altair")
+    pd = lazy_import("pandas")
+    frame = pd.DataFrame({"x": np.asarray(x, dtype=np.float32), "y": np.asarray(y, dtype=np.float32), "label": labels})
+    return alt.Chart(frame).mark_point(filled=True, size=size).encode(
+        x="x:Q", y="y:Q", color=alt.Color("label:N", scale=scale, title=None))
+
+def text_layer(x, y, labels, dy=-14):
+    """Annotations drawn just above the given points"""
+    alt = lazy_import("altair")
+    pd = lazy_import("pandas")
+    frame = pd.DataFrame({"x": np.asarray(x, dtype=np.float32), "y": np.asarray(y, dtype=np.float32), "label": labels})
+    points = alt.Chart(frame).mark_point(shape="triangle-down", filled=True, color="black", size=60).encode(x="x:Q", y="y:Q")
+    return points + points.mark_text(dy=dy, fontWeight="bold").encode(text="label:N")
+
+def layered_chart(*layers, title, height=360):
+    """Combine layers into one zoomable chart that fills the container width"""
+    alt = lazy_import("altair")
+    return alt.layer(*layers).properties(title=title, height=height, width="container").interactive()
@@ -0,0 +1,154 @@
+"""Constant-maturity VIX futures ETPs (VXX/SVXY-style) on top of the path engine.
+
+Each simulated spot VIX path is turned into a futures curve that mean-reverts
+towards a long-run level:
+
+    F(t, tau) = L + (VIX_t - L) * exp(-curve_speed * tau / 252)
+
+The index holds the front two monthly contracts, rolling daily from the
+first into the second so that the average maturity stays near one month,
+like the S&P VIX Short-Term Futures index. ETPs then apply a daily-reset
+leverage factor and an annual fee to the index return. Whenever spot sits
+below L, the curve is in contango, and the roll loses value even if spot
+never moves.
+
+Everything is vectorized across paths, days and leverage factors. The
+ensemble advances in time slices, so memory stays bounded by
+paths x slice length x leverage factors, however long the horizon.
+"""
+import numpy as np
+
+from vix_model import stream_vix_time_slices
+
+TRADING_DAYS = 252
+ROLL_DAYS = 21  # trading days between monthly expiries
+# Long-run VIX in the path engine: the vol level plus its 3.5 point premium
+PATH_VIX_PREMIUM = 3.5
+
+ETP_LEVERAGES = {
+    "Long 1x (VXX-style)": 1.0,
+    "Long 1.5x (UVXY-style)": 1.5,
+    "Short -0.5x (SVXY-style)": -0.5,
+    "Short -1x (SVIX-style)": -1.0,
+}
+
+def futures_price(vix, maturity_days, curve_level, curve_speed):
+    """Futures price for a maturity in trading days; at maturity 0 it settles to spot"""
+    return curve_level + (vix - curve_level) * np.exp(-curve_speed * np.asarray(maturity_days) / TRADING_DAYS)
+
+def roll_schedule(days, roll_days=ROLL_DAYS, days_to_expiry=ROLL_DAYS):
+    """Front-month maturity (trading days) and front-month weight for each day.
+
+    The weight on the front contract falls linearly from 1 to 0 over each
+    roll period, and the remainder sits in the second month.
+    """
+    front = roll_days - (np.arange(days) + roll_days - days_to_expiry) % roll_days
+    return front, front / roll_days
+
+def curve_exposure(front_prev, weight_prev, curve_speed):
+    """Index value sensitivity to (spot - L) yesterday and today, per day.
+
+    Every futures price is L + (spot - L) x decay(maturity), so the
+    two-contract index is L + (spot - L) x exposure as well. The exposure
+    only depends on the roll schedule, so it is computed once per day and
+    not once per path.
+    """
+    def decay(maturity):
+        return np.exp(-curve_speed * maturity / TRADING_DAYS)
+    second_prev = front_prev + ROLL_DAYS
+    exposure_prev = weight_prev * decay(front_prev) + (1 - weight_prev) * decay(second_prev)
+    # Both contracts are one day closer to expiry today; a front at maturity 0 settles to spot
+    exposure = weight_prev * decay(front_prev - 1) + (1 - weight_prev) * decay(second_prev - 1)
+    return exposure_prev, exposure
+
+def simulate_etp_navs(current_vix, future_vol, days, mean_rev_level, mean_rev_speed, leverages=None,
+                      n_paths=10000, term_premium=2.0, curve_speed=4.0, annual_fee=0.0089,
+                      quantiles=(0.05, 0.5, 0.95), quantile_every=5, block_days=63, noise_level=0.15, seed=None,
+                      dtype=np.float64):
+    """NAV distribution (starting at 1) of daily-reset VIX futures ETPs over simulated VIX paths.
+
+    leverages maps a label to a daily leverage factor (default
+    ETP_LEVERAGES). Returns per-day NAV means per product, plus NAV
+    quantiles every quantile_every days (the cross-path sort is the most
+    expensive step), terminal statistics, and the annualized roll yield:
+    the index return from the passage of time alone, with spot held fixed.
+    prob_drawdown_90 is the share of paths that fall 90% or more below
+    their running NAV peak at some point. The fee accrues from day 1.
+    With dtype=np.float32 the paths and the per-slice NAV arrays are
+    float32, so the widest buffer takes half the memory.
+    """
+    leverages = dict(ETP_LEVERAGES if leverages is None else leverages)
+    factors = np.array(list(leverages.values()), dtype=dtype)[:, None, None]
+    curve_level = mean_rev_level + PATH_VIX_PREMIUM + term_premium
+    front, weight = roll_schedule(days)
+    daily_fee = annual_fee / TRADING_DAYS
+
+    nav_mean = np.ones((len(leverages), days), dtype=dtype)
+    quantile_days = np.arange(0, days, quantile_every)
+    nav_quantiles = np.ones((len(leverages), len(quantiles), quantile_days.size), dtype=dtype)
+    nav = np.ones((len(leverages), n_paths), dtype=dtype)
+    nav_peak = np.ones((len(leverages), n_paths), dtype=dtype)
+    max_drawdown = np.zeros((len(leverages), n_paths), dtype=dtype)
+    roll_yield = np.zeros(n_paths)
+    vix_prev = None
+
+    for start, vix_slice, _ in stream_vix_time_slices(current_vix, future_vol, days, mean_rev_level,
+                                                      mean_rev_speed, n_paths, block_days=block_days,
+                                                      noise_level=noise_level, seed=seed, dtype=dtype):
+        size = vix_slice.shape[1]
+        # The return on day t comes from the positions set at the close of day t - 1
+        held = np.maximum(np.arange(start, start + size) - 1, 0)
+        previous = np.column_stack([vix_slice[:, :1] if vix_prev is None else vix_prev[:, None],
+                                    vix_slice[:, :-1]])
+        exposure_prev, exposure = (e.astype(dtype) for e in curve_exposure(front[held], weight[held], curve_speed))
+        value_prev = curve_level + (previous - curve_level) * exposure_prev
+        returns = (curve_level + (vix_slice - curve_level) * exposure) / value_prev - 1
+        carry = (curve_level + (previous - curve_level) * exposure) / value_prev - 1
+        if start == 0:
+            returns[:, 0] = carry[:, 0] = 0  # day 0 is the purchase date
+        roll_yield += carry.sum(axis=1)
+
+        # Daily reset: each day's growth is 1 + leverage x index return - fee; a product that loses
+        # everything in a day stays at zero
+        navs = factors * returns
+        navs += 1 - daily_fee
+        if start == 0:
+            navs[:, :, 0] = 1  # no fee accrues on the purchase date
+        np.maximum(navs, 0, out=navs)
+        np.cumprod(navs, axis=2, out=navs)
+        navs *= nav[:, :, None]
+        nav = navs[:, :, -1]
+        # Drawdown from each path's running peak, carried across slices
+        peaks = np.maximum.accumulate(navs, axis=2)
+        np.maximum(peaks, nav_peak[:, :, None], out=peaks)
+        nav_peak = peaks[:, :, -1]
+        max_drawdown = np.maximum(max_drawdown, (1 - navs / peaks).max(axis=2))
+
+        nav_mean[:, start:start + size] = navs.mean(axis=1)
+        recorded = (quantile_days >= start) & (quantile_days < start + size)
+        if recorded.any():
+            nav_quantiles[:, :, recorded] = np.moveaxis(
+                np.quantile(navs[:, :, quantile_days[recorded] - start], quantiles, axis=1), 0, 1)
+        vix_prev = vix_slice[:, -1].copy()
+
+    years = max(days - 1, 1) / TRADING_DAYS
+    products = {}
+    for i, label in enumerate(leverages):
+        products[label] = {
+            "leverage": float(factors[i, 0, 0]),
+            "nav_mean": nav_mean[i],
+            "nav_quantiles": nav_quantiles[i],
+            "terminal_median": float(np.median(nav[i])),
+            "terminal_mean": float(nav[i].mean()),
+            "prob_loss": float((nav[i] < 1).mean()),
+            "prob_drawdown_90": float((max_drawdown[i] >= 0.9).mean()),
+            "annualized_median_return": float(np.median(nav[i]) ** (1 / years) - 1),
+        }
+    return {
+        "days": days,
+        "quantiles": tuple(quantiles),
+        "quantile_days": quantile_days,
+        "curve_level": curve_level,
+        "roll_yield_annual": float(roll_yield.mean() / years),
+        "products": products,
+    }
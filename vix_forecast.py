@@ -0,0 +1,147 @@
+"""Out-of-sample benchmark for volatility forecasts over a daily VIX / index history.
+
+Compares HAR-RV regressions (daily, weekly and monthly realized vol, with
+and without VIX), the VIX itself, a random walk on trailing realized vol and
+the app's heuristic from predict_future_volatility. All are scored against
+the volatility realized over the following `horizon` trading days.
+
+Regressions are refit for every date using only targets already observed at
+that date. Instead of re-solving each window from scratch, X'X and X'y are
+accumulated as running (prefix) sums: each new observation is a rank-one
+update, and a rolling window drops its oldest observation by subtracting.
+This is the batched form of recursive least squares, so every date's
+coefficients, for any window length, cost one k x k solve.
+"""
+import numpy as np
+
+from vix_analytics import TRADING_DAYS, PremiumAnalytics, rolling_mean
+from vix_model import calculate_expected_vix, calculate_mean_reversion_adjustment, predict_future_volatility
+
+# HAR lags: one day, one week, one month
+HAR_LAGS = (1, 5, 22)
+# QLIKE needs positive forecasts; regressions occasionally dip below this
+MIN_FORECAST_VOL = 0.5
+
+def _cumulative(values):
+    """Prefix sums along axis 0 with a leading zero row"""
+    return np.concatenate([np.zeros((1,) + values.shape[1:]), np.cumsum(values, axis=0)])
+
+def rolling_least_squares(X, y, window=None, lag=0, min_obs=None):
+    """OLS coefficients for every row t, fitted on rows s <= t - lag (the last `window` of them, or all).
+
+    Rows with a NaN regressor or target are skipped. Returns an (n, k)
+    array, with NaN where fewer than min_obs rows are available (default:
+    the full window, or 252 rows when expanding).
+    """
+    X, y = np.asarray(X, dtype=float), np.asarray(y, dtype=float)
+    n, k = X.shape
+    valid = ~(np.isnan(X).any(axis=1) | np.isnan(y))
+    Xv, yv = np.where(valid[:, None], X, 0.0), np.where(valid, y, 0.0)
+    xx = _cumulative(Xv[:, :, None] * Xv[:, None, :])
+    xy = _cumulative(Xv * yv[:, None])
+    counts = _cumulative(valid.astype(float))
+
+    end = np.clip(np.arange(n) - lag + 1, 0, n)
+    start = np.zeros(n, dtype=int) if window is None else np.clip(end - window, 0, None)
+    if min_obs is None:
+        min_obs = TRADING_DAYS if window is None else window
+    fitted = counts[end] - counts[start] >= max(min_obs, k + 1)
+
+    A = xx[end[fitted]] - xx[start[fitted]]
+    b = xy[end[fitted]] - xy[start[fitted]]
+    # A tiny ridge keeps nearly collinear windows solvable without moving the fit
+    A += 1e-10 * np.trace(A, axis1=1, axis2=2)[:, None, None] * np.eye(k)
+    beta = np.full((n, k), np.nan)
+    beta[fitted] = np.linalg.solve(A, b[:, :, None])[:, :, 0]
+    return beta
+
+def mse_loss(forecast_vol, realized_vol):
+    return (forecast_vol - realized_vol) ** 2
+
+def qlike_loss(forecast_vol, realized_vol):
+    """QLIKE on variances: robust to noise in the realized proxy, penalizes under-prediction more"""
+    ratio = (realized_vol / np.maximum(forecast_vol, MIN_FORECAST_VOL)) ** 2
+    return ratio - np.log(ratio) - 1
+
+class ForecastEvaluation:
+    """Rolling out-of-sample comparison of volatility forecasts for one history and horizon.
+
+    Regressors and targets are built once. Coefficients are cached per
+    (model, window), so sweeping heuristic parameters or window lengths
+    reuses everything that did not change.
+    """
+
+    def __init__(self, vix, close, horizon=21):
+        self.horizon = horizon
+        self.vix = np.asarray(vix, dtype=float)
+        self.target = PremiumAnalytics(self.vix, close).forward_realized_vol(horizon)
+
+        # Returns ending at each date; the first date has none
+        returns = np.diff(np.log(np.asarray(close, dtype=float)))
+        squared = np.concatenate([[0.0], returns ** 2])
+        self.har = {}
+        for lag in HAR_LAGS:
+            realized = 100 * np.sqrt(TRADING_DAYS * rolling_mean(squared, lag))
+            realized[:lag] = np.nan
+            self.har[lag] = realized
+        self.recent_vol = 100 * np.sqrt(TRADING_DAYS * rolling_mean(squared, horizon))
+        self.recent_vol[:horizon] = np.nan
+        self._cache = {}
+
+    def regressors(self, model):
+        columns = [np.ones_like(self.vix)] + [self.har[lag] for lag in HAR_LAGS]
+        if model == "HAR-RV + VIX":
+            columns.append(self.vix)
+        return np.column_stack(columns)
+
+    def regression_forecast(self, model, window=None):
+        """Out-of-sample HAR forecast: coefficients use only targets known at each date"""
+        key = (model, window)
+        if key not in self._cache:
+            X = self.regressors(model)
+            # The target at s is realized over (s, s + horizon], so it is known from s + horizon on
+            beta = rolling_least_squares(X, self.target, window, lag=self.horizon)
+            self._cache[key] = np.einsum("nk,nk->n", X, beta)
+        return self._cache[key]
+
+    def heuristic_forecast(self, mean_rev_level, mean_rev_speed, premium_factor):
+        """The app's rule, with the trailing horizon-day realized vol as "recent volatility" """
+        mean_rev_adjustment = calculate_mean_reversion_adjustment(self.recent_vol, mean_rev_level, mean_rev_speed)
+        expected_vix = calculate_expected_vix(self.recent_vol, mean_rev_adjustment, premium_factor)
+        future_vol, _ = predict_future_volatility(self.recent_vol, self.vix, expected_vix, mean_rev_adjustment)
+        return future_vol
+
+    def forecasts(self, windows=(None,), mean_rev_level=16.0, mean_rev_speed=0.25, premium_factor=3.5):
+        """Label -> forecast array for every model; regressions once per window"""
+        forecasts = {
+            "Heuristic": self.heuristic_forecast(mean_rev_level, mean_rev_speed, premium_factor),
+            "VIX": self.vix,
+            "Random walk": self.recent_vol,
+        }
+        for window in windows:
+            label = "expanding" if window is None else f"{window}d"
+            for model in ("HAR-RV", "HAR-RV + VIX"):
+                forecasts[f"{model} ({label})"] = self.regression_forecast(model, window)
+        return forecasts
+
+    def evaluate(self, windows=(None,), **heuristic_params):
+        """MSE (vol points squared) and QLIKE per model, all on the dates where every forecast exists"""
+        forecasts = self.forecasts(windows, **heuristic_params)
+        common = ~np.isnan(self.target)
+        for forecast in forecasts.values():
+            common &= ~np.isnan(forecast)
+        if not common.any():
+            return []
+
+        realized = self.target[common]
+        rows = []
+        for label, forecast in forecasts.items():
+            forecast = forecast[common]
+            rows.append({
+                "model": label,
+                "mse": float(mse_loss(forecast, realized).mean()),
+                "qlike": float(qlike_loss(forecast, realized).mean()),
+                "bias": float((forecast - realized).mean()),
+                "observations": int(common.sum()),
+            })
+        return sorted(rows, key=lambda row: row["qlike"])
@@ -0,0 +1,168 @@
+import contextlib
+import cProfile
+import functools
+import importlib
+import io
+import json
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+# Module name -> (milliseconds, number of modules it pulled in), first import only
+IMPORT_TIMINGS = OrderedDict()
+_import_lock = threading.Lock()
+
+def lazy_import(name):
+    """Import a module on first real use and record how long the import took.
+    
+    The timing of the first import is recorded, similar to the cumulative
+    column of ``python -X importtime``. A module can already sit in
+    sys.modules while another thread is still initialising it, so the
+    lock-free fast path only trusts names whose import has finished here.
+    """
+    if name in IMPORT_TIMINGS:
+        return sys.modules[name]
+    with _import_lock:
+        loaded_before = len(sys.modules)
+        start = time.perf_counter()
+        # import_module waits on the per-module import lock, so it never returns a half-built module
+        module = importlib.import_module(name)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if name not in IMPORT_TIMINGS:
+            IMPORT_TIMINGS[name] = (elapsed_ms, len(sys.modules) - loaded_before)
+    return module
+
+# Stage name -> [calls, total seconds, max seconds]
+STAGE_TIMINGS = OrderedDict()
+COUNTERS = OrderedDict()
+_metrics_lock = threading.Lock()
+
+def record_stage(name, seconds):
+    with _metrics_lock:
+        stats = STAGE_TIMINGS.setdefault(name, [0, 0.0, 0.0])
+        stats[0] += 1
+        stats[1] += seconds
+        stats[2] = max(stats[2], seconds)
+
+@contextlib.contextmanager
+def stage_timer(name):
+    """Time the enclosed block and add it to STAGE_TIMINGS under ``name``"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+def timed(name):
+    """Decorator form of stage_timer"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage_timer(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def increment(name, amount=1):
+    with _metrics_lock:
+        COUNTERS[name] = COUNTERS.get(name, 0) + amount
+
+def metrics_snapshot(extra_counters=None):
+    """Plain-dict copy of all stage timings, counters and import timings"""
+    with _metrics_lock:
+        counters = dict(COUNTERS, **(extra_counters or {}))
+        stages = {name: {"calls": calls, "total_seconds": total, "max_seconds": worst}
+                  for name, (calls, total, worst) in STAGE_TIMINGS.items()}
+    imports = {name: {"milliseconds": elapsed_ms, "modules": modules}
+               for name, (elapsed_ms, modules) in IMPORT_TIMINGS.items()}
+    return {"timestamp": time.time(), "stages": stages, "counters": counters, "imports": imports}
+
+def _metric_name(name):
+    return "".join(c if c.isalnum() else "_" for c in name)
+
+def to_prometheus_text(snapshot):
+    """Render a metrics snapshot in the Prometheus text exposition format"""
+    lines = [
+        "# TYPE vix_stage_calls_total counter",
+        "# TYPE vix_stage_seconds_total counter",
+        "# TYPE vix_stage_seconds_max gauge",
+    ]
+    for name, stats in snapshot["stages"].items():
+        label = f'{{stage="{name}"}}'
+        lines.append(f"vix_stage_calls_total{label} {stats['calls']}")
+        lines.append(f"vix_stage_seconds_total{label} {stats['total_seconds']:.6f}")
+        lines.append(f"vix_stage_seconds_max{label} {stats['max_seconds']:.6f}")
+    for name, value in snapshot["counters"].items():
+        lines.append(f"# TYPE vix_{_metric_name(name)}_total counter")
+        lines.append(f"vix_{_metric_name(name)}_total {value}")
+    if snapshot["imports"]:
+        lines.append("# TYPE vix_import_milliseconds gauge")
+    for name, stats in snapshot["imports"].items():
+        lines.append(f'vix_import_milliseconds{{module="{name}"}} {stats["milliseconds"]:.3f}')
+    return "\n".join(lines) + "\n"
+
+# Exports only ever land in this directory, under a bare file name
+METRICS_DIR = os.environ.get("VIX_METRICS_DIR", "metrics")
+METRICS_EXTENSIONS = (".json", ".prom", ".txt")
+
+def metrics_export_path(name, directory=None):
+    """Path of an export called name inside the metrics directory; ValueError unless name is a plain file name"""
+    name = name.strip()
+    if "/" in name or "\\" in name or not name.endswith(METRICS_EXTENSIONS):
+        raise ValueError(f"Export name must be a plain file name ending in {', '.join(METRICS_EXTENSIONS)}")
+    directory = directory or METRICS_DIR
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, name)
+
+def export_metrics(path, snapshot):
+    """Write a snapshot to path: Prometheus text for .prom/.txt, JSON otherwise"""
+    if path.endswith((".prom", ".txt")):
+        content = to_prometheus_text(snapshot)
+    else:
+        content = json.dumps(snapshot, indent=2)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(content)
+    return path
+
+# cProfile is process-wide on Python 3.12+ (sys.monitoring), so only one session profiles at a time.
+# A rerun cut short by an exception, st.stop() or st.rerun() never reaches finish_rerun_profile;
+# its owner's next rerun stops that profiler, and any session may after PROFILE_MAX_SECONDS.
+PROFILE_MAX_SECONDS = 300.0
+_profile_lock = threading.Lock()
+_active_profile = None  # (owner, start time, profiler)
+
+def start_rerun_profile(owner, enabled=True):
+    """Start a cProfile run for owner; returns it, or None if disabled or someone else is profiling"""
+    global _active_profile
+    with _profile_lock:
+        if _active_profile is not None:
+            active_owner, started, profiler = _active_profile
+            if active_owner == owner or time.perf_counter() - started > PROFILE_MAX_SECONDS:
+                profiler.disable()
+                _active_profile = None
+        if not enabled or _active_profile is not None:
+            return None
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:  # another profiling tool is active in this process
+            return None
+        _active_profile = (owner, time.perf_counter(), profiler)
+        return profiler
+
+def finish_rerun_profile(profiler):
+    """Stop a profiler returned by start_rerun_profile and let the next session profile"""
+    global _active_profile
+    with _profile_lock:
+        profiler.disable()
+        if _active_profile is not None and _active_profile[2] is profiler:
+            _active_profile = None
+
+def profile_summary(profiler, limit=25):
+    """Top functions of a finished cProfile run by cumulative time, as text"""
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(limit)
+    return stream.getvalue()
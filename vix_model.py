@@ -0,0 +1,428 @@
+import threading
+
+import numpy as np
+
+# VIX prediction functions
+def calculate_mean_reversion_adjustment(recent_vol, mean_rev_level, mean_rev_speed):
+    """Calculate the mean reversion component of future volatility change"""
+    return (mean_rev_level - recent_vol) * mean_rev_speed
+
+def calculate_expected_vix(recent_vol, mean_rev_adjustment, premium_factor):
+    """Calculate what VIX 'should' be given current conditions"""
+    # The paper uses a relationship between squared values, but we simplify here
+    vol_adjustment = mean_rev_adjustment
+    volatility_premium = premium_factor
+    
+    return recent_vol + vol_adjustment + volatility_premium
+
+def predict_future_volatility(recent_vol, vix, expected_vix, mean_rev_adjustment):
+    """Predict future volatility based on VIX and recent volatility"""
+    # Mean reversion component
+    mean_rev_component = mean_rev_adjustment
+    
+    # VIX deviation component (difference between actual VIX and expected VIX)
+    vix_deviation = vix - expected_vix
+    
+    # Predicted change in volatility
+    predicted_change = mean_rev_component + (vix_deviation * 0.5)  # Dampening factor
+    
+    # Future volatility prediction
+    future_vol = recent_vol + predicted_change
+    
+    return future_vol, predicted_change
+
+def simulate_vix_path(current_vix, future_vol, days, mean_rev_level, mean_rev_speed, noise_level=0.15):
+    """Simulate a potential path for VIX over future days"""
+    vix_path = [current_vix]
+    vol_path = [future_vol]
+    
+    for i in range(1, days):
+        # Mean reversion for volatility
+        vol_mr = calculate_mean_reversion_adjustment(vol_path[-1], mean_rev_level, mean_rev_speed)
+        
+        # Add some noise to volatility path
+        vol_noise = np.random.normal(0, noise_level * vol_path[-1])
+        new_vol = max(5, vol_path[-1] + vol_mr + vol_noise)
+        vol_path.append(new_vol)
+        
+        # VIX follows volatility with a premium and some noise
+        vix_premium = 3.5 + 0.2 * np.random.randn()
+        vix_noise = np.random.normal(0, noise_level * vix_path[-1])
+        new_vix = max(5, new_vol + vix_premium + vix_noise)
+        vix_path.append(new_vix)
+    
+    return vix_path, vol_path
+
+# Streaming path simulation
+#
+# Path dtypes. float64 is the reference. With dtype=np.float32 the whole working set
+# is float32: path buffers, the normals (standard_normal(dtype=np.float32)), the
+# parameters and every temporary in _step_paths, so memory and bandwidth halve
+# throughout. float32 normals come from a different stream than float64 ones, so the
+# same seed gives a different, equally distributed ensemble in each dtype. Replaying
+# the float32 normals in float64 arithmetic isolates the rounding, which the mean
+# reversion keeps from compounding: over 10k paths x 252 days the relative error is
+# about 1e-6 per value and below 1e-5 for per-day means and quantiles, which are then
+# reduced in float32 (compact_precision_report reproduces the check). float16 is a
+# storage format only (SharedArrayStore, export_vix_ensemble): relative error
+# <= 2**-11 (~0.05%), values below 65504.
+SIMULATION_DTYPES = (np.float64, np.float32)
+
+def _step_paths(vix, vol, out_vix, out_vol, mean_rev_level, mean_rev_speed, noise_level, rng,
+                shocks=None, premium=3.5):
+    """Advance a batch of paths by one day, writing into the output buffers.
+    
+    Parameters broadcast against the path arrays, so they can differ per
+    path or per underlying. Pass shocks, shaped (3,) + vix.shape, to
+    supply correlated draws instead of independent ones.
+    """
+    # Draws, parameters and temporaries all take the path dtype, so a float32
+    # ensemble never touches float64 arrays (float16 buffers compute in float64)
+    dtype = out_vix.dtype if out_vix.dtype in SIMULATION_DTYPES else np.dtype(np.float64)
+    if shocks is None:
+        shocks = rng.standard_normal((3,) + vix.shape, dtype=dtype)
+    mean_rev_level, mean_rev_speed, noise_level, premium = (
+        np.asarray(param, dtype=dtype) for param in (mean_rev_level, mean_rev_speed, noise_level, premium))
+    
+    # Same dynamics as simulate_vix_path, applied to every path at once
+    vol_mr = calculate_mean_reversion_adjustment(vol, mean_rev_level, mean_rev_speed)
+    np.maximum(5, vol + vol_mr + noise_level * vol * shocks[0], out=out_vol)
+    
+    vix_premium = premium + 0.2 * shocks[1]
+    np.maximum(5, out_vol + vix_premium + noise_level * vix * shocks[2], out=out_vix)
+
+def stream_vix_paths(current_vix, future_vol, days, mean_rev_level, mean_rev_speed,
+                     n_paths, block_paths=1024, noise_level=0.15, seed=None, dtype=np.float64):
+    """Yield (vix_block, vol_block) arrays of shape (paths, days), block by block.
+    
+    The two arrays are preallocated once and overwritten on every yield, so
+    memory stays bounded by one block. Copy a block if you need to keep it.
+    The last block is a shorter view when n_paths is not a multiple of
+    block_paths.
+    """
+    rng = np.random.default_rng(seed)
+    vix_buf = np.empty((block_paths, days), dtype=dtype)
+    vol_buf = np.empty((block_paths, days), dtype=dtype)
+    
+    for start in range(0, n_paths, block_paths):
+        size = min(block_paths, n_paths - start)
+        vix_block = vix_buf[:size]
+        vol_block = vol_buf[:size]
+        vix_block[:, 0] = current_vix
+        vol_block[:, 0] = future_vol
+        
+        for day in range(1, days):
+            _step_paths(vix_block[:, day - 1], vol_block[:, day - 1],
+                        vix_block[:, day], vol_block[:, day],
+                        mean_rev_level, mean_rev_speed, noise_level, rng)
+        
+        yield vix_block, vol_block
+
+def stream_vix_time_slices(current_vix, future_vol, days, mean_rev_level, mean_rev_speed,
+                           n_paths, block_days=21, noise_level=0.15, seed=None, dtype=np.float64):
+    """Yield (start_day, vix_slice, vol_slice) with slices of shape (n_paths, block_days).
+    
+    All paths advance together, one time slice at a time, so reducers that
+    only need running statistics never hold the full (paths, days) matrix.
+    The slice buffers are reused between yields.
+    """
+    rng = np.random.default_rng(seed)
+    vix_buf = np.empty((n_paths, block_days), dtype=dtype)
+    vol_buf = np.empty((n_paths, block_days), dtype=dtype)
+    vix_last = np.full(n_paths, float(current_vix), dtype=dtype)
+    vol_last = np.full(n_paths, float(future_vol), dtype=dtype)
+    
+    for start in range(0, days, block_days):
+        size = min(block_days, days - start)
+        for offset in range(size):
+            if start + offset == 0:
+                vix_buf[:, 0] = vix_last
+                vol_buf[:, 0] = vol_last
+            else:
+                _step_paths(vix_last, vol_last, vix_buf[:, offset], vol_buf[:, offset],
+                            mean_rev_level, mean_rev_speed, noise_level, rng)
+            vix_last[:] = vix_buf[:, offset]
+            vol_last[:] = vol_buf[:, offset]
+        
+        yield start, vix_buf[:, :size], vol_buf[:, :size]
+
+def summarize_vix_ensemble(current_vix, future_vol, days, mean_rev_level, mean_rev_speed,
+                           n_paths=1000, quantiles=(0.05, 0.5, 0.95), noise_level=0.15, seed=None,
+                           dtype=np.float64):
+    """Per-day mean and quantiles of simulated VIX and volatility across an ensemble"""
+    summary = {
+        "vix_mean": np.empty(days, dtype=dtype),
+        "vol_mean": np.empty(days, dtype=dtype),
+        "vix_quantiles": np.empty((len(quantiles), days), dtype=dtype),
+        "vol_quantiles": np.empty((len(quantiles), days), dtype=dtype),
+    }
+    for start, vix_slice, vol_slice in stream_vix_time_slices(
+            current_vix, future_vol, days, mean_rev_level, mean_rev_speed, n_paths,
+            noise_level=noise_level, seed=seed, dtype=dtype):
+        stop = start + vix_slice.shape[1]
+        summary["vix_mean"][start:stop] = vix_slice.mean(axis=0)
+        summary["vol_mean"][start:stop] = vol_slice.mean(axis=0)
+        summary["vix_quantiles"][:, start:stop] = np.quantile(vix_slice, quantiles, axis=0)
+        summary["vol_quantiles"][:, start:stop] = np.quantile(vol_slice, quantiles, axis=0)
+    summary["quantiles"] = tuple(quantiles)
+    return summary
+
+def compact_precision_report(current_vix, future_vol, days, mean_rev_level, mean_rev_speed,
+                             n_paths=10000, dtype=np.float32, noise_level=0.15, seed=0):
+    """Rounding error of a compact-dtype ensemble against float64 arithmetic on the same draws.
+    
+    Both ensembles use the float32 normals that stream_vix_paths(dtype=np.float32)
+    draws for this seed; the reference replays them in float64, so the
+    difference is the arithmetic alone. The float32 ensemble is exactly
+    stream_vix_paths' float32 output; float16 (storage only) is the reference
+    cast down. Returns max/mean relative errors for paths and for per-day
+    means and quantiles, plus bytes per ensemble in each dtype.
+    """
+    def ensemble(arithmetic_dtype):
+        rng = np.random.default_rng(seed)
+        vix = np.empty((n_paths, days), dtype=arithmetic_dtype)
+        vol = np.empty((n_paths, days), dtype=arithmetic_dtype)
+        vix[:, 0], vol[:, 0] = current_vix, future_vol
+        for day in range(1, days):
+            shocks = rng.standard_normal((3, n_paths), dtype=np.float32).astype(arithmetic_dtype)
+            _step_paths(vix[:, day - 1], vol[:, day - 1], vix[:, day], vol[:, day],
+                        mean_rev_level, mean_rev_speed, noise_level, rng, shocks=shocks)
+        return vix
+    
+    reference = ensemble(np.float64)
+    compact = ensemble(dtype) if dtype in SIMULATION_DTYPES else reference.astype(dtype)
+    path_error = np.abs(compact.astype(np.float64) - reference) / np.abs(reference)
+    statistics = lambda paths: np.vstack([paths.mean(axis=0), np.quantile(paths, (0.05, 0.5, 0.95), axis=0)])
+    reference_stats = statistics(reference)
+    summary_error = np.abs(statistics(compact).astype(np.float64) - reference_stats) / np.abs(reference_stats)
+    return {
+        "dtype": np.dtype(dtype).name,
+        "max_rel_error": float(path_error.max()),
+        "mean_rel_error": float(path_error.mean()),
+        "summary_max_rel_error": float(summary_error.max()),
+        "bytes_reference": reference.nbytes,
+        "bytes_compact": compact.nbytes,
+    }
+
+class IncrementalVixPaths:
+    """A seeded ensemble that grows to whatever horizon is asked for.
+    
+    The simulated days, the RNG state and running per-day statistics are
+    kept between calls, so moving the horizon from 30 to 35 days simulates
+    only 5 new days, and a shorter horizon is just a prefix view. Because
+    the RNG continues where it stopped, every horizon shows the same path
+    up to its length. Safe to share between threads.
+    """
+    
+    def __init__(self, current_vix, future_vol, mean_rev_level, mean_rev_speed, n_paths=1000,
+                 quantiles=(0.05, 0.5, 0.95), noise_level=0.15, seed=None, dtype=np.float64):
+        self.mean_rev_level = mean_rev_level
+        self.mean_rev_speed = mean_rev_speed
+        self.noise_level = noise_level
+        self.quantiles = tuple(quantiles)
+        self.dtype = np.dtype(dtype)
+        self.days = 0
+        self.days_simulated = 0
+        self._rng = np.random.default_rng(seed)
+        self._vix = np.empty((n_paths, 0), dtype=self.dtype)
+        self._vol = np.empty((n_paths, 0), dtype=self.dtype)
+        self._stats = {
+            "vix_mean": np.empty(0, dtype=self.dtype),
+            "vol_mean": np.empty(0, dtype=self.dtype),
+            "vix_quantiles": np.empty((len(self.quantiles), 0), dtype=self.dtype),
+            "vol_quantiles": np.empty((len(self.quantiles), 0), dtype=self.dtype),
+        }
+        self._start = (float(current_vix), float(future_vol))
+        self._lock = threading.Lock()
+    
+    def _grow(self, days):
+        """Reallocate the path and statistics buffers to hold at least days columns"""
+        capacity = max(days, 2 * self._vix.shape[1])
+        for name in ("_vix", "_vol"):
+            old = getattr(self, name)
+            new = np.empty((old.shape[0], capacity), dtype=self.dtype)
+            new[:, :self.days] = old[:, :self.days]
+            setattr(self, name, new)
+        for name, old in self._stats.items():
+            new = np.empty(old.shape[:-1] + (capacity,), dtype=self.dtype)
+            new[..., :self.days] = old[..., :self.days]
+            self._stats[name] = new
+    
+    def _extend(self, days):
+        if days > self._vix.shape[1]:
+            self._grow(days)
+        for day in range(self.days, days):
+            if day == 0:
+                self._vix[:, 0], self._vol[:, 0] = self._start
+            else:
+                _step_paths(self._vix[:, day - 1], self._vol[:, day - 1], self._vix[:, day], self._vol[:, day],
+                            self.mean_rev_level, self.mean_rev_speed, self.noise_level, self._rng)
+        
+        new_days = slice(self.days, days)
+        self._stats["vix_mean"][new_days] = self._vix[:, new_days].mean(axis=0)
+        self._stats["vol_mean"][new_days] = self._vol[:, new_days].mean(axis=0)
+        self._stats["vix_quantiles"][:, new_days] = np.quantile(self._vix[:, new_days], self.quantiles, axis=0)
+        self._stats["vol_quantiles"][:, new_days] = np.quantile(self._vol[:, new_days], self.quantiles, axis=0)
+        self.days_simulated += days - self.days
+        self.days = days
+    
+    def paths(self, days):
+        """(vix, vol) arrays of shape (n_paths, days); read-only views into the shared buffers"""
+        with self._lock:
+            if days > self.days:
+                self._extend(days)
+            vix, vol = self._vix[:, :days], self._vol[:, :days]
+        vix.flags.writeable = False
+        vol.flags.writeable = False
+        return vix, vol
+    
+    def summary(self, days):
+        """Per-day statistics in the same layout as summarize_vix_ensemble"""
+        with self._lock:
+            if days > self.days:
+                self._extend(days)
+            summary = {name: values[..., :days].copy() for name, values in self._stats.items()}
+        summary["quantiles"] = self.quantiles
+        return summary
+
+# Historical event patterns
+def event_vix_profile(pre_vix, peak_vix, post_vix, days_to_peak, days_to_normalize,
+                      days_before=20, days_settled=20):
+    """Piecewise VIX profile around an event and the relative noise level of each day.
+    
+    Flat at pre_vix before the event, a linear build-up to peak_vix, a linear
+    decay to post_vix over days_to_normalize days, then flat for days_settled.
+    Returns (days relative to event start, profile, noise fraction).
+    """
+    profile = np.concatenate([
+        np.full(days_before, float(pre_vix)),
+        np.linspace(pre_vix, peak_vix, days_to_peak + 1)[1:],
+        np.linspace(peak_vix, post_vix, days_to_normalize + 1)[1:],
+        np.full(days_settled, float(post_vix)),
+    ])
+    noise_fraction = np.concatenate([
+        np.full(days_before, 0.05),
+        np.full(days_to_peak, 0.07),
+        np.full(days_to_normalize + days_settled, 0.1),
+    ])
+    days = np.arange(-days_before, days_to_peak + days_to_normalize + days_settled)
+    return days, profile, noise_fraction
+
+def simulate_event_vix(pre_vix, peak_vix, post_vix, days_to_peak, days_to_normalize,
+                       n_realizations=1, days_before=20, days_settled=20, seed=None):
+    """Noisy realizations of an event's VIX profile, shape (n_realizations, days), in one draw"""
+    days, profile, noise_fraction = event_vix_profile(pre_vix, peak_vix, post_vix, days_to_peak,
+                                                      days_to_normalize, days_before, days_settled)
+    shocks = np.random.default_rng(seed).standard_normal((n_realizations, profile.size))
+    return days, profile * (1 + noise_fraction * shocks)
+
+# Market simulator
+MARKET_TRENDS = {
+    "Bull Market": {"base_vol": 10, "drift": -0.1},
+    "Bear Market": {"base_vol": 20, "drift": 0.1},
+    "Sideways": {"base_vol": 15, "drift": 0},
+    "Crash": {"base_vol": 35, "drift": 0.3},
+}
+
+VOL_REGIMES = {
+    "Low": 0.7,
+    "Normal": 1.0,
+    "High": 1.5,
+    "Extreme": 2.5,
+}
+
+def _market_start(start_vol, rng):
+    """Starting (vix, vol) arrays for the market simulator"""
+    return start_vol + 4 + 2 * rng.standard_normal(start_vol.shape), start_vol.copy()
+
+def _market_step(vix, vol, drift, event_probability, rng):
+    """One simulator day for arrays of paths; event_probability is in percent"""
+    shocks = rng.standard_normal((3,) + vol.shape)
+    event_multiplier = np.where(rng.random(vol.shape) < event_probability / 100, 1.5, 1.0)
+    
+    # Update volatility with mean reversion, drift, and randomness
+    mean_rev = 0.05 * (15 - vol)
+    new_vol = np.maximum(5, vol + mean_rev + drift + 0.1 * vol * shocks[0]) * event_multiplier
+    
+    # VIX follows volatility with a premium and some noise
+    vix_premium = 3.5 + 0.5 * shocks[1]
+    new_vix = np.maximum(5, new_vol + vix_premium + 0.15 * vix * shocks[2]) * event_multiplier
+    return new_vix, new_vol
+
+def simulate_market_paths(market_trend, vol_regime, event_probability, days, n_paths=1, seed=None,
+                          dtype=np.float64):
+    """Simulate the Market Simulator scenario; returns (vix, vol) arrays of shape (n_paths, days)"""
+    rng = np.random.default_rng(seed)
+    trend = MARKET_TRENDS[market_trend]
+    start_vol = np.full(n_paths, trend["base_vol"] * VOL_REGIMES[vol_regime], dtype=float)
+    
+    vix = np.empty((n_paths, days), dtype=dtype)
+    vol = np.empty((n_paths, days), dtype=dtype)
+    vix[:, 0], vol[:, 0] = _market_start(start_vol, rng)
+    for day in range(1, days):
+        vix[:, day], vol[:, day] = _market_step(vix[:, day - 1], vol[:, day - 1], trend["drift"],
+                                                event_probability, rng)
+    return vix, vol
+
+def stream_market_paths(market_trend, vol_regime, event_probability, days, n_paths,
+                        block_paths=4096, seed=None, dtype=np.float64):
+    """Yield Market Simulator (vix, vol) blocks of shape (paths, days); buffers are reused between yields"""
+    rng = np.random.default_rng(seed)
+    trend = MARKET_TRENDS[market_trend]
+    vix_buf = np.empty((block_paths, days), dtype=dtype)
+    vol_buf = np.empty((block_paths, days), dtype=dtype)
+    
+    for start in range(0, n_paths, block_paths):
+        size = min(block_paths, n_paths - start)
+        vix, vol = vix_buf[:size], vol_buf[:size]
+        vix[:, 0], vol[:, 0] = _market_start(np.full(size, trend["base_vol"] * VOL_REGIMES[vol_regime]), rng)
+        for day in range(1, days):
+            vix[:, day], vol[:, day] = _market_step(vix[:, day - 1], vol[:, day - 1], trend["drift"],
+                                                    event_probability, rng)
+        yield vix, vol
+
+def sweep_market_scenarios(event_probabilities, horizons, n_paths=200, seed=None):
+    """Evaluate every trend x regime x event probability at every horizon in one batch.
+    
+    All scenarios and paths advance together as one (scenarios, paths) array,
+    and only running sums and extremes are kept, so memory does not grow
+    with the horizon. Scenarios are independent, so the grid can also be
+    split and run in separate processes. Returns a list of row dicts, one
+    per scenario and horizon, with statistics averaged across paths.
+    """
+    rng = np.random.default_rng(seed)
+    grid = [(trend, regime, float(p)) for trend in MARKET_TRENDS for regime in VOL_REGIMES
+            for p in event_probabilities]
+    drift = np.array([MARKET_TRENDS[t]["drift"] for t, _, _ in grid], dtype=float)[:, None]
+    probability = np.array([p for _, _, p in grid])[:, None]
+    start_vol = np.array([MARKET_TRENDS[t]["base_vol"] * VOL_REGIMES[r] for t, r, _ in grid], dtype=float)
+    
+    vix, vol = _market_start(np.repeat(start_vol[:, None], n_paths, axis=1), rng)
+    vix_sum, vol_sum = vix.copy(), vol.copy()
+    vix_max, vix_min = vix.copy(), vix.copy()
+    
+    rows = []
+    horizons = sorted(horizons)
+    for day in range(1, horizons[-1] + 1):
+        if day in horizons:
+            avg_vix = vix_sum.mean(axis=1) / day
+            avg_vol = vol_sum.mean(axis=1) / day
+            mean_max = vix_max.mean(axis=1)
+            mean_min = vix_min.mean(axis=1)
+            p95_max = np.percentile(vix_max, 95, axis=1)
+            for i, (trend, regime, p) in enumerate(grid):
+                rows.append({
+                    "trend": trend, "regime": regime, "event_probability": p, "horizon": day,
+                    "avg_vix": float(avg_vix[i]), "avg_vol": float(avg_vol[i]),
+                    "avg_premium": float(avg_vix[i] - avg_vol[i]),
+                    "mean_max_vix": float(mean_max[i]), "mean_min_vix": float(mean_min[i]),
+                    "p95_max_vix": float(p95_max[i]),
+                })
+        if day == horizons[-1]:
+            break
+        vix, vol = _market_step(vix, vol, drift, probability, rng)
+        vix_sum += vix
+        vol_sum += vol
+        np.maximum(vix_max, vix, out=vix_max)
+        np.minimum(vix_min, vix, out=vix_min)
+    return rows
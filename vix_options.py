@@ -0,0 +1,210 @@
+import numpy as np
+
+from vix_metrics import lazy_import
+
+TRADING_DAYS = 252
+
+def _norm_pdf(x):
+    return np.exp(-0.5 * x * x) / np.sqrt(2 * np.pi)
+
+def _d1_d2(forward, strike, expiry, vol):
+    total_vol = vol * np.sqrt(expiry)
+    d1 = (np.log(forward / strike) + 0.5 * total_vol ** 2) / total_vol
+    return d1, d1 - total_vol, total_vol
+
+def black76_price(forward, strike, expiry, vol, rate=0.0, is_call=True):
+    """Black-76 price of options on a forward (e.g. a VIX future).
+    
+    All arguments broadcast, so a strike x expiry grid is one call:
+    ``black76_price(f, strikes[:, None], expiries[None, :], vol)``.
+    Expiry is in years, vol is the annualized volatility of the forward.
+    """
+    ndtr = lazy_import("scipy.special").ndtr
+    forward, strike, expiry, vol = np.broadcast_arrays(*map(np.asarray, (forward, strike, expiry, vol)))
+    d1, d2, _ = _d1_d2(forward, strike, expiry, vol)
+    discount = np.exp(-rate * expiry)
+    call = discount * (forward * ndtr(d1) - strike * ndtr(d2))
+    put = discount * (strike * ndtr(-d2) - forward * ndtr(-d1))
+    return np.where(is_call, call, put)
+
+def black76_greeks(forward, strike, expiry, vol, rate=0.0, is_call=True):
+    """Black-76 price and Greeks as a dict of broadcast arrays.
+    
+    Delta and gamma are with respect to the forward, vega is per 1.00 of
+    vol, theta is per year and rho is per 1.00 of rate.
+    """
+    ndtr = lazy_import("scipy.special").ndtr
+    forward, strike, expiry, vol = np.broadcast_arrays(*map(np.asarray, (forward, strike, expiry, vol)))
+    d1, d2, total_vol = _d1_d2(forward, strike, expiry, vol)
+    discount = np.exp(-rate * expiry)
+    price = black76_price(forward, strike, expiry, vol, rate, is_call)
+    pdf_d1 = _norm_pdf(d1)
+    
+    delta = np.where(is_call, discount * ndtr(d1), -discount * ndtr(-d1))
+    gamma = discount * pdf_d1 / (forward * total_vol)
+    vega = discount * forward * pdf_d1 * np.sqrt(expiry)
+    theta = -discount * forward * pdf_d1 * vol / (2 * np.sqrt(expiry)) + rate * price
+    rho = -expiry * price
+    return {"price": price, "delta": delta, "gamma": gamma, "vega": vega, "theta": theta, "rho": rho}
+
+def monte_carlo_option_prices(vix_paths, strikes, expiry_days, rate=0.0, is_call=True):
+    """Monte Carlo prices of VIX calls or puts for every strike x expiry from a path ensemble.
+    
+    vix_paths has shape (n_paths, days) and expiry_days are day indices into
+    it. Each expiry's terminal values are sorted once and every strike is
+    priced from prefix sums, so the cost is O(n log n + strikes) per expiry
+    instead of O(n x strikes). Returns (prices, standard errors), each of
+    shape (strikes, expiries).
+    """
+    strikes = np.asarray(strikes, dtype=float)
+    expiry_days = np.asarray(expiry_days, dtype=int)
+    terminal = np.sort(np.asarray(vix_paths)[:, expiry_days], axis=0)
+    n_paths = terminal.shape[0]
+    
+    prices = np.empty((strikes.size, expiry_days.size))
+    std_errors = np.empty_like(prices)
+    for j in range(expiry_days.size):
+        values = terminal[:, j]
+        sums = np.concatenate([[0.0], np.cumsum(values)])
+        squares = np.concatenate([[0.0], np.cumsum(values * values)])
+        below = np.searchsorted(values, strikes)  # paths with V < K
+        if is_call:
+            count = n_paths - below
+            payoff_sum = (sums[-1] - sums[below]) - strikes * count
+            payoff_sq = (squares[-1] - squares[below]) - 2 * strikes * (sums[-1] - sums[below]) + strikes ** 2 * count
+        else:
+            count = below
+            payoff_sum = strikes * count - sums[below]
+            payoff_sq = strikes ** 2 * count - 2 * strikes * sums[below] + squares[below]
+        mean = payoff_sum / n_paths
+        variance = np.maximum(payoff_sq / n_paths - mean ** 2, 0)
+        discount = np.exp(-rate * expiry_days[j] / TRADING_DAYS)
+        prices[:, j] = discount * mean
+        std_errors[:, j] = discount * np.sqrt(variance / n_paths)
+    return prices, std_errors
+
+# Implied volatility
+CALENDAR_DAYS = 365
+
+def _corrado_miller_guess(call, forward, strike, expiry, discount):
+    """Rational approximation of Black-76 implied vol, used as Newton's starting point"""
+    call = call / discount
+    half_gap = (forward - strike) / 2
+    root = np.maximum((call - half_gap) ** 2 - (forward - strike) ** 2 / np.pi, 0)
+    total_vol = np.sqrt(2 * np.pi) / (forward + strike) * (call - half_gap + np.sqrt(root))
+    return total_vol / np.sqrt(expiry)
+
+def implied_volatility(price, forward, strike, expiry, rate=0.0, is_call=True,
+                       tol=1e-10, max_iter=100, vol_bounds=(1e-4, 10.0)):
+    """Invert Black-76 for a whole batch of option prices at once.
+    
+    Every quote is mapped by put-call parity to its out-of-the-money side,
+    where the price is pure time value. Each option then runs a
+    safeguarded Newton iteration from a Corrado-Miller starting guess. The
+    iteration keeps a [lo, hi] bracket and falls back to bisection whenever
+    a Newton step would leave it or vega is too small. Options still
+    iterating are handled as one masked array update, with no per-option
+    loop. Prices outside the no-arbitrage bounds return NaN.
+    
+    Returns (vols, converged, iterations) arrays shaped like the broadcast inputs.
+    """
+    ndtr = lazy_import("scipy.special").ndtr
+    price, forward, strike, expiry, rate, is_call = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (price, forward, strike, expiry, rate, is_call)))
+    discount = np.exp(-rate * expiry)
+    
+    # Solve on the out-of-the-money side, where the price is all time value
+    otm_call = strike >= forward
+    parity = discount * (forward - strike)
+    call = np.where(is_call.astype(bool), price, price + parity)
+    target = np.where(otm_call, call, call - parity)
+    upper = discount * np.where(otm_call, forward, strike)
+    valid = (target > 0) & (target < upper) & (expiry > 0)
+    
+    lo = np.full(target.shape, vol_bounds[0])
+    hi = np.full(target.shape, vol_bounds[1])
+    with np.errstate(invalid="ignore", divide="ignore"):
+        guess = np.nan_to_num(_corrado_miller_guess(call, forward, strike, expiry, discount), nan=0.5)
+    vol = np.array(np.clip(guess, vol_bounds[0], vol_bounds[1]), dtype=float)
+    converged = np.array(~valid)
+    iterations = np.zeros(target.shape, dtype=int)
+    
+    for _ in range(max_iter):
+        active = ~converged
+        if not active.any():
+            break
+        f, k, t, d, goal, v, c = (x[active] for x in (forward, strike, expiry, discount, target, vol, otm_call))
+        d1, d2, total_vol = _d1_d2(f, k, t, v)
+        model = np.where(c, d * (f * ndtr(d1) - k * ndtr(d2)), d * (k * ndtr(-d2) - f * ndtr(-d1)))
+        vega = d * f * _norm_pdf(d1) * np.sqrt(t)
+        diff = model - goal
+        
+        # Tighten the bracket: Black-76 price is increasing in vol
+        lo_a = np.where(diff < 0, v, lo[active])
+        hi_a = np.where(diff > 0, v, hi[active])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = v - diff / vega
+        use_newton = (vega > 1e-12 * f) & (newton >= lo_a) & (newton <= hi_a)
+        done = (np.abs(diff) < tol * goal) | (hi_a - lo_a < tol * v)
+        new_v = np.where(done, v, np.where(use_newton, newton, 0.5 * (lo_a + hi_a)))
+        
+        lo[active], hi[active], vol[active] = lo_a, hi_a, new_v
+        iterations[active] += 1
+        converged[active] = done
+    
+    vol = np.where(valid, vol, np.nan)
+    return vol, converged & valid, iterations
+
+def load_option_quotes(path):
+    """Read option quotes from a local CSV file (path or file object) into a dict of arrays.
+    
+    Required columns: expiry_days (calendar days), strike, type (C or P),
+    forward, and either price or bid and ask (the mid is used). rate is
+    optional and defaults to 0.
+    """
+    import pandas as pd
+    quotes = pd.read_csv(path)
+    quotes.columns = [c.strip().lower() for c in quotes.columns]
+    if "price" not in quotes:
+        quotes["price"] = (quotes["bid"] + quotes["ask"]) / 2
+    if "rate" not in quotes:
+        quotes["rate"] = 0.0
+    result = {name: quotes[name].to_numpy(dtype=float)
+              for name in ("expiry_days", "strike", "forward", "price", "rate")}
+    result["is_call"] = quotes["type"].astype(str).str.strip().str.upper().str.startswith("C").to_numpy()
+    return result
+
+def quotes_implied_volatility(quotes, **kwargs):
+    """Implied vols for every quote loaded by load_option_quotes"""
+    return implied_volatility(quotes["price"], quotes["forward"], quotes["strike"],
+                              quotes["expiry_days"] / CALENDAR_DAYS, quotes["rate"], quotes["is_call"], **kwargs)
+
+def atm_implied_vix(quotes, target_days=30, implied=None):
+    """VIX-style level from quotes: at-the-money implied variance interpolated to target_days.
+    
+    For each expiry the strike closest to the forward is used; total variance
+    is interpolated linearly in time (flat extrapolation of vol outside the
+    quoted expiries). Returns the level in percentage points. implied is a
+    quotes_implied_volatility result to reuse instead of solving again.
+    """
+    vols, converged, _ = quotes_implied_volatility(quotes) if implied is None else implied
+    expiries, variances = [], []
+    for days in np.unique(quotes["expiry_days"]):
+        mask = (quotes["expiry_days"] == days) & converged
+        if not mask.any():
+            continue
+        moneyness = np.abs(np.log(quotes["strike"][mask] / quotes["forward"][mask]))
+        atm_vol = vols[mask][np.argmin(moneyness)]
+        expiries.append(days / CALENDAR_DAYS)
+        variances.append(atm_vol ** 2 * days / CALENDAR_DAYS)
+    if not expiries:
+        return np.nan
+    target = target_days / CALENDAR_DAYS
+    expiries, variances = np.array(expiries), np.array(variances)
+    if target <= expiries[0]:
+        total_variance = variances[0] / expiries[0] * target
+    elif target >= expiries[-1]:
+        total_variance = variances[-1] / expiries[-1] * target
+    else:
+        total_variance = np.interp(target, expiries, variances)
+    return 100 * np.sqrt(total_variance / target)
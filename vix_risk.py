@@ -0,0 +1,210 @@
+"""Tail-risk analytics over simulated VIX ensembles.
+
+Everything is computed per block of paths with cumulative max/min
+operations: threshold exceedance and time to the first spike (first
+passage), VaR/ES of VIX rises over several horizons, and drawdown/spike
+statistics. Between blocks, TailRiskAccumulator keeps only per-day counts
+and fixed-size quantile sketches, so its memory does not depend on the
+number of paths, and so ensembles far larger than
+memory can be streamed through it block by block. Blocks may be float32
+(see the compact mode in vix_model).
+"""
+import numpy as np
+
+DEFAULT_THRESHOLDS = (20, 30, 40, 50)
+DEFAULT_HORIZONS = (1, 5, 21)
+VAR_LEVELS = (0.95, 0.99)
+
+# Quantiles, VaR and ES are kept in log-bucketed sketches with this relative accuracy;
+# magnitudes below SKETCH_MIN_VALUE count as zero
+RELATIVE_ACCURACY = 0.002
+SKETCH_MIN_VALUE = 1e-4
+
+def first_passage_days(paths, thresholds):
+    """Day of the first close at or above each threshold, shape (thresholds, paths); -1 if never.
+
+    The running maximum is non-decreasing, so the first passage is the
+    number of days on which it is still below the threshold.
+    """
+    running_max = np.maximum.accumulate(paths, axis=1)
+    below = (running_max[None, :, :] < np.asarray(thresholds, dtype=float)[:, None, None]).sum(axis=2)
+    return np.where(below < paths.shape[1], below, -1)
+
+def max_drawdown(paths):
+    """Largest fall from a running peak per path: (points, fraction of the peak)"""
+    running_max = np.maximum.accumulate(paths, axis=1)
+    return (running_max - paths).max(axis=1), (1 - paths / running_max).max(axis=1)
+
+def max_spike(paths):
+    """Largest rise from a running trough per path: (points, fraction of the trough)"""
+    running_min = np.minimum.accumulate(paths, axis=1)
+    return (paths - running_min).max(axis=1), (paths / running_min - 1).max(axis=1)
+
+def value_at_risk(changes, levels=VAR_LEVELS):
+    """Upper-tail VaR and expected shortfall of VIX changes (a rise is the loss for short volatility)"""
+    changes = np.asarray(changes)
+    result = {}
+    for level in levels:
+        var = np.quantile(changes, level)
+        result[level] = {"var": float(var), "es": float(changes[changes >= var].mean())}
+    return result
+
+class QuantileSketch:
+    """Streaming quantiles within a relative accuracy (DDSketch-style log buckets).
+
+    Bucket k holds magnitudes in (gamma^(k-1), gamma^k] with
+    gamma = (1 + a) / (1 - a), separately for each sign, so any value in a
+    bucket is within a of the bucket's representative 2 gamma^k / (gamma + 1).
+    The buckets grow with the range of magnitudes seen, never with the number
+    of values. Per-bucket sums make the mean exact.
+    """
+
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY, min_value=SKETCH_MIN_VALUE):
+        self.min_value = min_value
+        self.log_gamma = np.log((1 + relative_accuracy) / (1 - relative_accuracy))
+        self.zero_count, self.zero_sum = 0, 0.0
+        # Sign -> [first key, counts, sums] over a contiguous key range
+        self._stores = {}
+        self.min, self.max = np.inf, -np.inf
+
+    def _add_to_store(self, sign, values):
+        if values.size == 0:
+            return
+        keys = np.ceil(np.log(np.minimum(np.abs(values), np.finfo(float).max)) / self.log_gamma).astype(np.int64)
+        lo, hi = int(keys.min()), int(keys.max())
+        first, counts, sums = self._stores.get(sign, (lo, np.zeros(0, dtype=np.int64), np.zeros(0)))
+        new_first, new_last = min(first, lo), max(first + counts.size - 1, hi)
+        if new_first < first or new_last >= first + counts.size:
+            grown_counts = np.zeros(new_last - new_first + 1, dtype=np.int64)
+            grown_sums = np.zeros(new_last - new_first + 1)
+            grown_counts[first - new_first:first - new_first + counts.size] = counts
+            grown_sums[first - new_first:first - new_first + counts.size] = sums
+            first, counts, sums = new_first, grown_counts, grown_sums
+        counts += np.bincount(keys - first, minlength=counts.size)
+        sums += np.bincount(keys - first, weights=values, minlength=counts.size)
+        self._stores[sign] = (first, counts, sums)
+
+    def add(self, values):
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return
+        zero = np.abs(values) < self.min_value
+        self.zero_count += int(zero.sum())
+        self.zero_sum += float(values[zero].sum())
+        self._add_to_store(1, values[~zero & (values > 0)])
+        self._add_to_store(-1, values[~zero & (values < 0)])
+        self.min, self.max = min(self.min, values.min()), max(self.max, values.max())
+
+    def _ordered(self):
+        """Representatives, counts and sums of every bucket in increasing value order"""
+        parts = []
+        for sign in (-1, 1):
+            if sign in self._stores:
+                first, counts, sums = self._stores[sign]
+                keys = first + np.arange(counts.size)
+                magnitudes = 2 * np.exp(keys * self.log_gamma) / (1 + np.exp(self.log_gamma))
+                part = (sign * magnitudes, counts, sums)
+                parts.append(tuple(x[::-1] for x in part) if sign < 0 else part)
+            if sign < 0:
+                parts.append((np.zeros(1), np.array([self.zero_count]), np.array([self.zero_sum])))
+        return tuple(np.concatenate(x) for x in zip(*parts))
+
+    def mean(self):
+        _, counts, sums = self._ordered()
+        return sums.sum() / counts.sum()
+
+    def quantile(self, q):
+        """Value of rank floor(q (n - 1))"""
+        representatives, counts, _ = self._ordered()
+        cumulative = np.cumsum(counts)
+        i = int(np.searchsorted(cumulative, np.floor(q * (cumulative[-1] - 1)), side="right"))
+        return float(np.clip(representatives[i], self.min, self.max))
+
+    def tail_mean(self, q):
+        """Mean of the values ranked at or above q (n - 1): the expected shortfall beyond the q-quantile"""
+        representatives, counts, sums = self._ordered()
+        cumulative = np.cumsum(counts)
+        rank = int(np.ceil(q * (cumulative[-1] - 1)))
+        i = int(np.searchsorted(cumulative, rank, side="right"))
+        in_bucket = cumulative[i] - rank
+        representative = np.clip(representatives[i], self.min, self.max)
+        return float((sums[i + 1:].sum() + in_bucket * representative) / (counts[i + 1:].sum() + in_bucket))
+
+class TailRiskAccumulator:
+    """Streaming tail-risk summary; feed (paths, days) VIX blocks with update(), read summary()
+
+    Memory is one QuantileSketch per horizon and statistic, however many
+    paths go through. Means are exact; medians, p95, VaR and ES are within
+    about RELATIVE_ACCURACY (0.2%) of the exact values.
+    """
+
+    def __init__(self, days, thresholds=DEFAULT_THRESHOLDS, horizons=DEFAULT_HORIZONS, levels=VAR_LEVELS):
+        self.days = days
+        self.thresholds = tuple(thresholds)
+        # The final day is always a horizon; sorted(set()) keeps it from appearing twice when it is also listed
+        self.horizons = tuple(sorted({h for h in horizons if h < days} | {days - 1}))
+        self.levels = tuple(levels)
+        self.n_paths = 0
+        # First-passage day counts per threshold; the last column counts paths that never got there
+        self.first_passage_counts = np.zeros((len(self.thresholds), days + 1), dtype=np.int64)
+        self._changes = {h: QuantileSketch() for h in self.horizons}
+        self._per_path = {name: QuantileSketch() for name in ("drawdown", "drawdown_pct", "spike", "spike_pct", "peak")}
+
+    def update(self, vix_block):
+        """Add a block of paths; only counts and sketches are kept"""
+        first = first_passage_days(vix_block, self.thresholds)
+        for i in range(len(self.thresholds)):
+            self.first_passage_counts[i] += np.bincount(np.where(first[i] < 0, self.days, first[i]),
+                                                        minlength=self.days + 1)
+        for horizon in self.horizons:
+            self._changes[horizon].add(vix_block[:, horizon] - vix_block[:, 0])
+        drawdown, drawdown_pct = max_drawdown(vix_block)
+        spike, spike_pct = max_spike(vix_block)
+        for name, values in (("drawdown", drawdown), ("drawdown_pct", drawdown_pct), ("spike", spike),
+                             ("spike_pct", spike_pct), ("peak", vix_block.max(axis=1))):
+            self._per_path[name].add(values)
+        self.n_paths += vix_block.shape[0]
+
+    def summary(self):
+        days = np.arange(self.days)
+
+        thresholds = {}
+        for i, threshold in enumerate(self.thresholds):
+            counts = self.first_passage_counts[i]
+            hits = counts[:-1].sum()
+            cdf = np.cumsum(counts[:-1]) / self.n_paths
+            thresholds[threshold] = {
+                "prob_exceed": float(hits / self.n_paths),
+                "first_passage_cdf": cdf,
+                # Median over all paths is undefined when fewer than half ever cross
+                "median_days_to_first": int(np.searchsorted(cdf, 0.5)) if cdf[-1] >= 0.5 else None,
+                "mean_days_to_first_given_hit": float((days * counts[:-1]).sum() / hits) if hits else None,
+            }
+
+        def describe(sketch):
+            return {"mean": float(sketch.mean()), "median": sketch.quantile(0.5), "p95": sketch.quantile(0.95)}
+
+        def var_es(sketch):
+            return {level: {"var": sketch.quantile(level), "es": sketch.tail_mean(level)} for level in self.levels}
+
+        return {
+            "n_paths": self.n_paths,
+            "days": self.days,
+            "thresholds": thresholds,
+            "var_es": {h: var_es(self._changes[h]) for h in self.horizons},
+            "drawdown": describe(self._per_path["drawdown"]),
+            "drawdown_pct": describe(self._per_path["drawdown_pct"]),
+            "spike": describe(self._per_path["spike"]),
+            "spike_pct": describe(self._per_path["spike_pct"]),
+            "peak": describe(self._per_path["peak"]),
+        }
+
+def summarize_tail_risk(blocks, days, thresholds=DEFAULT_THRESHOLDS, horizons=DEFAULT_HORIZONS, levels=VAR_LEVELS):
+    """Tail-risk summary over an iterable of VIX blocks (or a single (paths, days) matrix)"""
+    if isinstance(blocks, np.ndarray):
+        blocks = [blocks]
+    accumulator = TailRiskAccumulator(days, thresholds, horizons, levels)
+    for block in blocks:
+        accumulator.update(block)
+    return accumulator.summary()
@@ -0,0 +1,329 @@
+"""Local HTTP/JSON service around the VIX model core.
+
+Concurrent requests that arrive within a few milliseconds of each other are
+coalesced into one vectorized evaluation, and the results are fanned back
+out to the waiting connections. Standard library only (asyncio).
+
+    python vix_service.py --port 8765
+
+    POST /expected_vix  {"recent_vol", "mean_rev_level", "mean_rev_speed", "premium_factor"}
+    POST /predict       same fields plus "vix"
+    POST /simulate      predict fields plus "days", optional "n_paths", "seed"
+    GET  /metrics       Prometheus text
+    GET  /health
+"""
+import argparse
+import asyncio
+import json
+import time
+import traceback
+from http import HTTPStatus
+
+import numpy as np
+
+from vix_metrics import increment, metrics_snapshot, record_stage, to_prometheus_text
+from vix_model import (
+    calculate_expected_vix,
+    calculate_mean_reversion_adjustment,
+    predict_future_volatility,
+    stream_vix_paths,
+)
+
+MODEL_FIELDS = ("recent_vol", "mean_rev_level", "mean_rev_speed", "premium_factor")
+MAX_BODY_BYTES = 1 << 20
+MAX_SIMULATED_VALUES = 5_000_000  # n_paths x days per request, and per ensemble in a batch
+# Paths with their own metric; anything else is recorded as "other"
+ROUTES = ("/expected_vix", "/predict", "/simulate", "/health", "/metrics")
+
+class ServiceBusy(Exception):
+    pass
+
+class MicroBatcher:
+    """Collect submitted items for up to max_delay seconds (or max_batch items) and evaluate them together.
+    
+    batch_fn takes a list of items and returns a list of results in the same
+    order. It runs in a worker thread so the event loop keeps accepting
+    connections meanwhile. If a batch fails, its items are retried one by
+    one, so a single bad item cannot fail the others. The queue is bounded, so when it is full,
+    submit raises ServiceBusy instead of letting latency grow without
+    limit.
+    """
+    
+    def __init__(self, name, batch_fn, max_batch=256, max_delay=0.005, max_queue=4096):
+        self.name = name
+        self.batch_fn = batch_fn
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self._worker = None
+    
+    def start(self):
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+    
+    async def submit(self, item):
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self.queue.put_nowait((item, future))
+        except asyncio.QueueFull:
+            increment(f"{self.name}_rejected")
+            raise ServiceBusy(self.name) from None
+        return await future
+    
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_delay
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            
+            items = [item for item, _ in batch]
+            start = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(None, self.batch_fn, items)
+            except Exception as exc:
+                results = [exc] if len(items) == 1 else await loop.run_in_executor(None, self._run_each, items)
+            record_stage(f"{self.name}_batch", time.perf_counter() - start)
+            increment(f"{self.name}_batches")
+            increment(f"{self.name}_requests", len(batch))
+            
+            for (_, future), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+    
+    def _run_each(self, items):
+        results = []
+        for item in items:
+            try:
+                results.extend(self.batch_fn([item]))
+            except Exception as exc:
+                results.append(exc)
+        return results
+
+def _columns(items, fields):
+    """Stack one field per request into float arrays"""
+    return [np.array([float(item[field]) for item in items]) for field in fields]
+
+def evaluate_model_batch(items):
+    """Expected VIX and, when "vix" is present, the volatility prediction, for many requests at once"""
+    recent_vol, mean_rev_level, mean_rev_speed, premium_factor = _columns(items, MODEL_FIELDS)
+    mean_rev_adjustment = calculate_mean_reversion_adjustment(recent_vol, mean_rev_level, mean_rev_speed)
+    expected_vix = calculate_expected_vix(recent_vol, mean_rev_adjustment, premium_factor)
+    
+    has_vix = np.array(["vix" in item for item in items])
+    vix = np.array([float(item.get("vix", np.nan)) for item in items])
+    future_vol, predicted_change = predict_future_volatility(recent_vol, vix, expected_vix, mean_rev_adjustment)
+    
+    results = []
+    for i in range(len(items)):
+        result = {"mean_rev_adjustment": mean_rev_adjustment[i], "expected_vix": expected_vix[i]}
+        if has_vix[i]:
+            result.update(vix_deviation=vix[i] - expected_vix[i], future_vol=future_vol[i],
+                          predicted_change=predicted_change[i])
+        results.append({k: float(v) for k, v in result.items()})
+    return results
+
+def _simulate_group(items, days):
+    """One ensemble for every unseeded request with this horizon; per-path parameters broadcast"""
+    predictions = evaluate_model_batch(items)
+    n_paths = [int(item.get("n_paths", 1000)) for item in items]
+    owner = np.repeat(np.arange(len(items)), n_paths)
+    per_path = lambda values: np.asarray(values, dtype=float)[owner]
+    
+    vix_paths, _ = next(stream_vix_paths(
+        per_path([item["vix"] for item in items]),
+        per_path([p["future_vol"] for p in predictions]),
+        days,
+        per_path([item["mean_rev_level"] for item in items]),
+        per_path([item["mean_rev_speed"] for item in items]),
+        n_paths=owner.size, block_paths=owner.size,
+    ))
+    bounds = np.concatenate([[0], np.cumsum(n_paths)])
+    return [_ensemble_result(prediction, vix_paths[bounds[i]:bounds[i + 1]])
+            for i, prediction in enumerate(predictions)]
+
+def _ensemble_result(prediction, vix_paths):
+    quantiles = np.quantile(vix_paths, [0.05, 0.5, 0.95], axis=0)
+    return dict(prediction, vix_mean=vix_paths.mean(axis=0).tolist(), vix_q05=quantiles[0].tolist(),
+                vix_median=quantiles[1].tolist(), vix_q95=quantiles[2].tolist(), terminal_vix=vix_paths[:, -1].mean())
+
+def simulate_batch(items):
+    """Path-ensemble summaries; unseeded requests sharing a horizon are simulated as one ensemble"""
+    results = [None] * len(items)
+    groups = {}
+    for i, item in enumerate(items):
+        if "seed" in item:
+            prediction = evaluate_model_batch([item])[0]
+            vix_paths, _ = next(stream_vix_paths(
+                float(item["vix"]), prediction["future_vol"], int(item["days"]), float(item["mean_rev_level"]),
+                float(item["mean_rev_speed"]), n_paths=int(item.get("n_paths", 1000)),
+                block_paths=int(item.get("n_paths", 1000)), seed=int(item["seed"])))
+            results[i] = _ensemble_result(prediction, vix_paths)
+        else:
+            groups.setdefault(int(item["days"]), []).append(i)
+    for days, indices in groups.items():
+        # Split the group so no single ensemble holds more than MAX_SIMULATED_VALUES per array
+        chunk, chunk_paths = [], 0
+        for i in indices + [None]:
+            n_paths = 0 if i is None else int(items[i].get("n_paths", 1000))
+            if chunk and (i is None or (chunk_paths + n_paths) * days > MAX_SIMULATED_VALUES):
+                for j, result in zip(chunk, _simulate_group([items[j] for j in chunk], days)):
+                    results[j] = result
+                chunk, chunk_paths = [], 0
+            if i is not None:
+                chunk.append(i)
+                chunk_paths += n_paths
+    return results
+
+def _number(payload, field, integer=False):
+    """A finite JSON number (an integer if asked); anything else is the client's error"""
+    value = payload[field]
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not np.isfinite(value):
+        raise ValueError(f"{field} must be a finite number")
+    if integer:
+        if value != int(value):
+            raise ValueError(f"{field} must be an integer")
+        return int(value)
+    return float(value)
+
+def validate(path, payload):
+    """Check one request and return the item to batch: only known fields, coerced to float/int.
+    
+    Every value is checked here, so a malformed request fails on its own
+    and never reaches a batch shared with other clients.
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("body must be a JSON object")
+    fields = MODEL_FIELDS + (("vix",) if path != "/expected_vix" else ())
+    required = fields + (("days",) if path == "/simulate" else ())
+    missing = [f for f in required if f not in payload]
+    if missing:
+        raise ValueError(f"missing fields: {', '.join(missing)}")
+    item = {field: _number(payload, field) for field in fields}
+    if path == "/simulate":
+        item["days"] = _number(payload, "days", integer=True)
+        item["n_paths"] = _number(payload, "n_paths", integer=True) if "n_paths" in payload else 1000
+        if "seed" in payload:
+            item["seed"] = _number(payload, "seed", integer=True)
+            if item["seed"] < 0:
+                raise ValueError("seed must be non-negative")
+        if item["days"] < 1 or item["n_paths"] < 1 or item["days"] * item["n_paths"] > MAX_SIMULATED_VALUES:
+            raise ValueError(f"days x n_paths must be between 1 and {MAX_SIMULATED_VALUES}")
+    return item
+
+class ModelService:
+    def __init__(self, max_delay=0.005, max_batch=256, max_queue=4096, keepalive_timeout=15.0):
+        self.keepalive_timeout = keepalive_timeout
+        self.batchers = {
+            "/expected_vix": MicroBatcher("expected_vix", evaluate_model_batch, max_batch, max_delay, max_queue),
+            "/predict": MicroBatcher("predict", evaluate_model_batch, max_batch, max_delay, max_queue),
+            "/simulate": MicroBatcher("simulate", simulate_batch, min(max_batch, 64), max_delay, max_queue),
+        }
+    
+    async def dispatch(self, method, path, body):
+        """Return (status, content type, body bytes) for one request"""
+        if method == "GET" and path == "/health":
+            return HTTPStatus.OK, "application/json", b'{"status": "ok"}'
+        if method == "GET" and path == "/metrics":
+            return HTTPStatus.OK, "text/plain; version=0.0.4", to_prometheus_text(metrics_snapshot()).encode()
+        if path not in self.batchers:
+            return HTTPStatus.NOT_FOUND, "application/json", b'{"error": "not found"}'
+        if method != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED, "application/json", b'{"error": "use POST"}'
+        
+        try:
+            payload = json.loads(body or b"{}")
+            result = await self.batchers[path].submit(validate(path, payload))
+        except ServiceBusy:
+            return HTTPStatus.SERVICE_UNAVAILABLE, "application/json", b'{"error": "queue full"}'
+        except (ValueError, TypeError, KeyError) as exc:
+            return HTTPStatus.BAD_REQUEST, "application/json", json.dumps({"error": str(exc)}).encode()
+        return HTTPStatus.OK, "application/json", json.dumps(result).encode()
+    
+    async def handle_connection(self, reader, writer):
+        """Serve requests on one connection until the client closes it or goes idle (keep-alive)"""
+        try:
+            while True:
+                try:
+                    request_line = await asyncio.wait_for(reader.readline(), self.keepalive_timeout)
+                except asyncio.TimeoutError:
+                    break
+                if not request_line:
+                    break
+                start = time.perf_counter()
+                method, target, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = (await reader.readline()).decode("latin-1").strip()
+                    if not line:
+                        break
+                    name, _, value = line.partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    status, content_type, body = HTTPStatus.REQUEST_ENTITY_TOO_LARGE, "application/json", b'{"error": "body too large"}'
+                    keep_alive = False
+                else:
+                    body = await reader.readexactly(length) if length else b""
+                    path = target.split("?", 1)[0]
+                    try:
+                        status, content_type, body = await self.dispatch(method, path, body)
+                    except Exception as exc:
+                        # A bug in the model, the batcher or the encoding: answer 500 and keep serving
+                        traceback.print_exc()
+                        increment("http_internal_errors")
+                        status, content_type = HTTPStatus.INTERNAL_SERVER_ERROR, "application/json"
+                        body = json.dumps({"error": "internal error", "type": type(exc).__name__}).encode()
+                    connection = headers.get("connection", "").lower()
+                    keep_alive = connection == "keep-alive" or (version == "HTTP/1.1" and connection != "close")
+                
+                writer.write(
+                    f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+                    f"Content-Type: {content_type}\r\nContent-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + body
+                )
+                await writer.drain()
+                route = target.split("?", 1)[0]
+                record_stage(f"http_{route.strip('/') if route in ROUTES else 'other'}", time.perf_counter() - start)
+                if not keep_alive:
+                    break
+        except (ValueError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+    
+    async def serve(self, host, port):
+        for batcher in self.batchers.values():
+            batcher.start()
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        print(f"Serving VIX model on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Local HTTP/JSON service for the VIX model core")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-delay-ms", type=float, default=5.0, help="how long to wait to fill a batch")
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--max-queue", type=int, default=4096, help="pending requests per endpoint before 503")
+    args = parser.parse_args(argv)
+    service = ModelService(args.max_delay_ms / 1000, args.max_batch, args.max_queue)
+    try:
+        asyncio.run(service.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
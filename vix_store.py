@@ -0,0 +1,331 @@
+import glob
+import io
+import json
+import os
+import threading
+import time
+import uuid
+
+import numpy as np
+
+from vix_model import SIMULATION_DTYPES, stream_vix_paths
+
+# Layout of exported ensembles: (paths, days, field) with field 0 = VIX, 1 = vol
+ENSEMBLE_FIELDS = ("vix", "vol")
+# Metadata that must match before paths from another seed can be appended to an ensemble
+SCENARIO_KEYS = ("current_vix", "future_vol", "mean_rev_level", "mean_rev_speed", "noise_level", "dtype", "days")
+
+def _metadata_path(path):
+    return str(path) + ".json"
+
+def _plain(metadata):
+    """Metadata with numpy scalars (np.float32 parameters, np.int64 seeds, ...) as plain Python values"""
+    return {key: value.item() if isinstance(value, np.generic) else value for key, value in metadata.items()}
+
+def open_ensemble_npy(path, n_paths, days, metadata, dtype=np.float64):
+    """Create a memory-mapped .npy file for an ensemble and write its metadata sidecar"""
+    # numpy 2 writes np.int64(...) into the header for numpy ints, which np.load cannot parse
+    n_paths, days = int(n_paths), int(days)
+    array = np.lib.format.open_memmap(path, mode="w+", dtype=dtype,
+                                      shape=(n_paths, days, len(ENSEMBLE_FIELDS)))
+    with open(_metadata_path(path), "w") as f:
+        json.dump(_plain(dict(metadata, n_paths=n_paths, days=days, fields=list(ENSEMBLE_FIELDS))), f, indent=2)
+    return array
+
+def load_ensemble_npy(path):
+    """Open an exported .npy ensemble read-only without loading it into memory"""
+    with open(_metadata_path(path)) as f:
+        metadata = json.load(f)
+    return np.load(path, mmap_mode="r"), metadata
+
+def _write_metadata(path, metadata):
+    """Replace the .json sidecar atomically, so readers see the old or the new metadata"""
+    tmp_path = _metadata_path(path) + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(tmp_path, _metadata_path(path))
+
+def _resize_ensemble_npy(path, n_paths):
+    """Set the path count of an exported .npy in place, growing or truncating the file; returns the old count.
+    
+    numpy pads .npy headers so the first axis can grow without moving the
+    data, so only the header is rewritten and nothing is copied.
+    """
+    fmt = np.lib.format
+    with open(path, "r+b") as f:
+        version = fmt.read_magic(f)
+        read_header, write_header = {
+            (1, 0): (fmt.read_array_header_1_0, fmt.write_array_header_1_0),
+            (2, 0): (fmt.read_array_header_2_0, fmt.write_array_header_2_0),
+        }[version]
+        old_shape, fortran_order, dtype = read_header(f)
+        header_size = f.tell()
+        if fortran_order:
+            raise ValueError(f"{path} is Fortran-ordered and cannot grow along the path axis")
+        shape = (int(n_paths),) + tuple(int(n) for n in old_shape[1:])
+        header = io.BytesIO()
+        write_header(header, {"descr": fmt.dtype_to_descr(dtype), "fortran_order": False, "shape": shape})
+        if header.tell() != header_size:
+            raise ValueError(f"The header of {path} has no room to grow; export to a new file instead")
+        f.seek(0)
+        f.write(header.getvalue())
+        f.truncate(header_size + int(np.prod(shape)) * dtype.itemsize)
+    return old_shape[0]
+
+def _parquet():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError as exc:
+        raise ImportError("Parquet export requires pyarrow (pip install pyarrow)") from exc
+    return pa, pq
+
+def _block_table(pa, start, vix_block, vol_block):
+    """Flatten a block of paths into long format: one row per (path, day)"""
+    n, days = vix_block.shape
+    return pa.table({
+        "path": np.repeat(np.arange(start, start + n, dtype=np.int32), days),
+        "day": np.tile(np.arange(days, dtype=np.int16), n),
+        "vix": vix_block.ravel(),
+        "vol": vol_block.ravel(),
+    })
+
+def _parquet_metadata(pq, path):
+    return json.loads(pq.ParquetFile(path).schema_arrow.metadata[b"vix_ensemble"])
+
+def _parquet_parts(path):
+    """Part files of a Parquet ensemble dataset directory, in the order they were appended"""
+    return sorted(glob.glob(os.path.join(path, "part-*.parquet")))
+
+def read_ensemble_parquet(path, start=0, stop=None):
+    """Read paths [start, stop) from a Parquet ensemble (a file or an appended dataset directory).
+    
+    Returns a (paths, days, 2) array and the metadata. Each simulated block
+    is its own row group, so the path filter only touches the row groups
+    that overlap the requested range.
+    """
+    _, pq = _parquet()
+    parts = _parquet_parts(path) if os.path.isdir(path) else [path]
+    if not parts:
+        raise FileNotFoundError(f"No Parquet parts in {path}")
+    # Every part carries the metadata of the whole dataset as of its own append
+    metadata = _parquet_metadata(pq, parts[-1])
+    stop = metadata["n_paths"] if stop is None else min(stop, metadata["n_paths"])
+    columns = []
+    for part in parts:
+        table = pq.read_table(part, columns=list(ENSEMBLE_FIELDS),
+                              filters=[("path", ">=", start), ("path", "<", stop)])
+        columns.append(np.column_stack([table.column(name).to_numpy() for name in ENSEMBLE_FIELDS]))
+    values = np.concatenate(columns)
+    return values.reshape(stop - start, metadata["days"], len(ENSEMBLE_FIELDS)), metadata
+
+def _existing_metadata(path, fmt):
+    """Metadata of the ensemble an append would extend, or None if there is nothing there yet"""
+    if fmt == "npy":
+        if not os.path.exists(path):
+            return None
+        with open(_metadata_path(path)) as f:
+            return json.load(f)
+    if os.path.isfile(path):
+        raise ValueError(f"{path} is a single Parquet file; appends need a dataset directory")
+    parts = _parquet_parts(path) if os.path.isdir(path) else []
+    return _parquet_metadata(_parquet()[1], parts[-1]) if parts else None
+
+def _check_append(existing, metadata):
+    """Raise ValueError unless paths simulated with metadata can extend the existing ensemble"""
+    changed = [key for key in SCENARIO_KEYS if existing.get(key) != metadata[key]]
+    if changed:
+        raise ValueError(f"Cannot append: the existing ensemble has a different {', '.join(changed)}")
+    seeds = [segment["seed"] for segment in existing.get("segments", [{"seed": existing["seed"]}])]
+    if metadata["seed"] in seeds:
+        raise ValueError(f"Cannot append: seed {metadata['seed']} was already used for this ensemble")
+
+def _remove(*paths):
+    for path in paths:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+def export_vix_ensemble(path, current_vix, future_vol, days, mean_rev_level, mean_rev_speed,
+                        n_paths, seed, noise_level=0.15, block_paths=1024, fmt="npy", dtype=np.float64,
+                        append=False):
+    """Simulate an ensemble block by block and append each block to disk as it is produced.
+    
+    fmt is "npy" (memory-mapped, metadata in a .json sidecar) or "parquet"
+    (one row group per block, metadata in the schema). The parameters and
+    seed are stored alongside so the exact scenario set can be regenerated.
+    
+    With append=True the paths are added to an existing ensemble instead of
+    replacing it: the .npy grows in place, and Parquet writes a new part
+    file into path, which is then a dataset directory. The scenario
+    parameters must match and the seed must be new (and not None), so every
+    segment listed under "segments" in the metadata can be regenerated on
+    its own. A failed export leaves no partial file behind, and a failed
+    append leaves the existing ensemble as it was.
+    
+    dtype sets the stored precision. float32 is simulated in float32;
+    float16 (npy only, Parquet falls back to float32) is simulated in
+    float64 and rounded on write, a quarter of the size at a relative
+    error of at most 2**-11.
+    """
+    n_paths, days = int(n_paths), int(days)
+    dtype = np.dtype(dtype)
+    if fmt not in ("npy", "parquet"):
+        raise ValueError(f"Unknown export format: {fmt}")
+    if fmt == "parquet" and dtype == np.float16:
+        dtype = np.dtype(np.float32)
+    simulation_dtype = dtype if dtype in SIMULATION_DTYPES else np.float64
+    metadata = _plain({
+        "current_vix": current_vix,
+        "future_vol": future_vol,
+        "mean_rev_level": mean_rev_level,
+        "mean_rev_speed": mean_rev_speed,
+        "noise_level": noise_level,
+        "seed": seed,
+        "dtype": dtype.name,
+        "days": days,
+    })
+    existing = None
+    if append:
+        if metadata["seed"] is None:
+            raise ValueError("Appending needs an explicit seed so the new paths can be regenerated")
+        existing = _existing_metadata(path, fmt)
+    segments, first_path = [], 0
+    if existing is not None:
+        _check_append(existing, metadata)
+        first_path = existing["n_paths"]
+        segments = existing.get("segments", [{"seed": existing["seed"], "start": 0, "n_paths": first_path}])
+    metadata.update(
+        seed=segments[0]["seed"] if segments else metadata["seed"],
+        n_paths=first_path + n_paths,
+        fields=list(ENSEMBLE_FIELDS),
+        segments=segments + [{"seed": metadata["seed"], "start": first_path, "n_paths": n_paths}],
+    )
+    stream = stream_vix_paths(current_vix, future_vol, days, mean_rev_level, mean_rev_speed,
+                              n_paths, block_paths=block_paths, noise_level=noise_level, seed=seed,
+                              dtype=simulation_dtype)
+    
+    if fmt == "npy":
+        if existing is not None:
+            _resize_ensemble_npy(path, first_path + n_paths)
+        array = None
+        try:
+            if existing is None:
+                array = open_ensemble_npy(path, n_paths, days, metadata, dtype=dtype)
+            else:
+                array = np.lib.format.open_memmap(path, mode="r+")
+            start = first_path
+            for vix_block, vol_block in stream:
+                stop = start + vix_block.shape[0]
+                array[start:stop, :, 0] = vix_block
+                array[start:stop, :, 1] = vol_block
+                start = stop
+            array.flush()
+            array = None
+            if existing is not None:
+                _write_metadata(path, metadata)
+        except BaseException:
+            array = None  # drop the mapping before the file is removed or shrunk back
+            if existing is None:
+                _remove(path, _metadata_path(path))
+            else:
+                _resize_ensemble_npy(path, first_path)
+            raise
+    else:
+        pa, pq = _parquet()
+        if append:
+            os.makedirs(path, exist_ok=True)
+            target = os.path.join(path, f"part-{len(segments):05d}.parquet")
+        else:
+            target = path
+        writer = None
+        completed = False
+        try:
+            start = first_path
+            for vix_block, vol_block in stream:
+                table = _block_table(pa, start, vix_block, vol_block)
+                if writer is None:
+                    schema = table.schema.with_metadata({"vix_ensemble": json.dumps(metadata)})
+                    writer = pq.ParquetWriter(target, schema)
+                writer.write_table(table.cast(writer.schema))
+                start += vix_block.shape[0]
+            completed = True
+        finally:
+            if writer is not None:
+                writer.close()
+            if not completed:
+                _remove(target)
+    
+    return metadata
+
+class SharedArrayStore:
+    """Process-wide store for per-session result arrays, kept out of st.session_state.
+    
+    Sessions keep only the returned key. Arrays are stored as compact
+    float32 (or the given dtype). Each session holds at most one entry per
+    name, so re-running a simulation replaces its previous result. Sessions
+    that have not been seen for idle_timeout seconds are dropped by
+    evict_idle. Byte counts per session and in total are always available,
+    so memory per session is bounded and measurable.
+    """
+    
+    def __init__(self, idle_timeout=1800.0, dtype=np.float32):
+        self.idle_timeout = idle_timeout
+        self.dtype = dtype
+        self._entries = {}  # key -> dict of arrays
+        self._sessions = {}  # session id -> {"last_seen": t, "names": {name: key}}
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def _nbytes(arrays):
+        return sum(a.nbytes for a in arrays.values())
+    
+    def put(self, session_id, name, arrays):
+        """Store arrays under this session's name, replacing any previous entry; returns the key"""
+        compact = {k: np.ascontiguousarray(v, dtype=self.dtype) for k, v in arrays.items()}
+        for array in compact.values():
+            array.flags.writeable = False
+        key = f"{session_id}:{name}:{uuid.uuid4().hex}"
+        with self._lock:
+            session = self._sessions.setdefault(session_id, {"last_seen": time.monotonic(), "names": {}})
+            old_key = session["names"].get(name)
+            if old_key is not None:
+                self._entries.pop(old_key, None)
+            session["names"][name] = key
+            session["last_seen"] = time.monotonic()
+            self._entries[key] = compact
+        return key
+    
+    def get(self, key):
+        """The stored arrays for key (read-only), or None if they were evicted"""
+        with self._lock:
+            return self._entries.get(key)
+    
+    def touch(self, session_id):
+        with self._lock:
+            if session_id in self._sessions:
+                self._sessions[session_id]["last_seen"] = time.monotonic()
+    
+    def evict_idle(self, now=None):
+        """Drop every session idle for longer than idle_timeout; returns how many were dropped"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            idle = [sid for sid, s in self._sessions.items() if now - s["last_seen"] > self.idle_timeout]
+            for session_id in idle:
+                for key in self._sessions.pop(session_id)["names"].values():
+                    self._entries.pop(key, None)
+        return len(idle)
+    
+    def session_bytes(self, session_id):
+        with self._lock:
+            names = self._sessions.get(session_id, {"names": {}})["names"]
+            return sum(self._nbytes(self._entries[key]) for key in names.values() if key in self._entries)
+    
+    def stats(self):
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "entries": len(self._entries),
+                "total_bytes": sum(self._nbytes(arrays) for arrays in self._entries.values()),
+            }
@@ -0,0 +1,124 @@
+"""Many volatility indices (VIX, VXN, RVX, VSTOXX-style, ...) through one batched pipeline.
+
+Each underlying is one row of a table: its recent realized vol, its
+implied index level, mean reversion parameters and premium. The model is
+evaluated for every row at once. The paths of all underlyings advance
+together as a (paths, underlyings) array, and the daily shocks are
+correlated across underlyings through a Cholesky factor that the whole
+batch shares.
+"""
+import json
+import os
+
+import numpy as np
+
+from vix_model import (
+    SIMULATION_DTYPES,
+    _step_paths,
+    calculate_expected_vix,
+    calculate_mean_reversion_adjustment,
+    predict_future_volatility,
+)
+
+UNDERLYINGS_FILE = os.environ.get(
+    "VIX_UNDERLYINGS_FILE",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "underlyings.json"),
+)
+TABLE_FIELDS = ("recent_vol", "index_level", "mean_rev_level", "mean_rev_speed", "premium_factor")
+
+def load_underlyings(path=UNDERLYINGS_FILE):
+    """Read the underlying registry: {"underlyings": {name: row}, "correlation": {"default", "pairs"}}"""
+    with open(path, encoding="utf-8") as f:
+        registry = json.load(f)
+    for row in registry["underlyings"].values():
+        row.update({field: float(row[field]) for field in TABLE_FIELDS})
+    return registry
+
+def table_columns(rows):
+    """{name: row dict} -> names plus one float array per model field"""
+    names = list(rows)
+    return names, {field: np.array([float(rows[name][field]) for name in names]) for field in TABLE_FIELDS}
+
+def correlation_matrix(names, pairs=None, default=0.6):
+    """Symmetric correlation matrix from "A/B" pair entries, with default for unlisted pairs"""
+    pairs = pairs or {}
+    corr = np.full((len(names), len(names)), float(default))
+    np.fill_diagonal(corr, 1.0)
+    index = {name: i for i, name in enumerate(names)}
+    for pair, value in pairs.items():
+        a, b = pair.split("/")
+        if a in index and b in index:
+            corr[index[a], index[b]] = corr[index[b], index[a]] = value
+    return corr
+
+def cholesky_factor(corr):
+    """Lower Cholesky factor of a correlation matrix.
+
+    Hand-edited matrices are not always positive definite. In that case
+    the eigenvalues are clipped, the matrix is rescaled to a unit
+    diagonal, and the factor of that nearby matrix is returned.
+    """
+    corr = np.asarray(corr, dtype=float)
+    try:
+        return np.linalg.cholesky(corr)
+    except np.linalg.LinAlgError:
+        eigenvalues, eigenvectors = np.linalg.eigh((corr + corr.T) / 2)
+        repaired = (eigenvectors * np.maximum(eigenvalues, 1e-6)) @ eigenvectors.T
+        scale = np.sqrt(np.diag(repaired))
+        return np.linalg.cholesky(repaired / np.outer(scale, scale))
+
+def evaluate_underlyings(rows):
+    """Model outputs for every underlying in one vectorized pass; returns names and column arrays"""
+    names, columns = table_columns(rows)
+    mean_rev_adjustment = calculate_mean_reversion_adjustment(columns["recent_vol"], columns["mean_rev_level"],
+                                                              columns["mean_rev_speed"])
+    expected = calculate_expected_vix(columns["recent_vol"], mean_rev_adjustment, columns["premium_factor"])
+    future_vol, predicted_change = predict_future_volatility(columns["recent_vol"], columns["index_level"],
+                                                             expected, mean_rev_adjustment)
+    return names, {
+        "mean_rev_adjustment": mean_rev_adjustment,
+        "expected_level": expected,
+        "deviation": columns["index_level"] - expected,
+        "future_vol": future_vol,
+        "predicted_change": predicted_change,
+    }
+
+def simulate_underlyings(rows, days, n_paths=1000, corr=None, noise_level=0.15, seed=None, dtype=np.float64):
+    """Correlated index and vol paths for every underlying, each of shape (underlyings, paths, days).
+
+    corr defaults to independence. The same Cholesky factor turns every
+    day's independent normals into correlated ones, for all paths in one
+    matrix product. dtype=np.float32 keeps the paths, the shocks and the
+    factor in float32, halving memory and bandwidth for the whole batch.
+    """
+    rng = np.random.default_rng(seed)
+    names, columns = table_columns(rows)
+    _, model = evaluate_underlyings(rows)
+    shock_dtype = np.dtype(dtype) if dtype in SIMULATION_DTYPES else np.dtype(np.float64)
+    factor = cholesky_factor(np.eye(len(names)) if corr is None else corr).astype(shock_dtype)
+
+    index_paths = np.empty((days, n_paths, len(names)), dtype=dtype)
+    vol_paths = np.empty((days, n_paths, len(names)), dtype=dtype)
+    index_paths[0] = columns["index_level"]
+    vol_paths[0] = model["future_vol"]
+    for day in range(1, days):
+        shocks = rng.standard_normal((3, n_paths, len(names)), dtype=shock_dtype) @ factor.T
+        _step_paths(index_paths[day - 1], vol_paths[day - 1], index_paths[day], vol_paths[day],
+                    columns["mean_rev_level"], columns["mean_rev_speed"], noise_level, rng,
+                    shocks=shocks, premium=columns["premium_factor"])
+    return names, index_paths.transpose(2, 1, 0), vol_paths.transpose(2, 1, 0)
+
+def summarize_underlyings(rows, days, n_paths=1000, corr=None, quantiles=(0.05, 0.5, 0.95), seed=None,
+                          dtype=np.float64):
+    """Per-underlying model outputs, per-day index quantiles and the realized cross-correlation of index changes"""
+    names, index_paths, _ = simulate_underlyings(rows, days, n_paths, corr, seed=seed, dtype=dtype)
+    _, model = evaluate_underlyings(rows)
+    changes = np.diff(index_paths, axis=2).reshape(len(names), -1)
+    return {
+        "names": names,
+        "model": model,
+        "quantiles": tuple(quantiles),
+        "index_quantiles": np.quantile(index_paths, quantiles, axis=1).transpose(1, 0, 2),
+        "terminal_mean": index_paths[:, :, -1].mean(axis=1),
+        "realized_correlation": np.corrcoef(changes) if len(names) > 1 else np.ones((1, 1)),
+    }
@@ -0,0 +1,117 @@
+import numpy as np
+
+from vix_metrics import lazy_import
+from vix_options import CALENDAR_DAYS, black76_price, quotes_implied_volatility
+
+# Dense log-moneyness grid shared by every smile, with its integration weights
+DENSE_GRID = np.linspace(-2.0, 1.0, 601)
+
+def integration_weights(grid=DENSE_GRID):
+    """Trapezoid weights for the variance-swap integral in log-moneyness.
+    
+    With K = F e^x, the strike integral 2/T * sum Q(K) dK / K^2 becomes
+    2/T * (1/F) * int Q(F e^x) e^-x dx. The e^-x factor does not depend on
+    the date, so it is folded into the weights once.
+    """
+    dx = np.gradient(grid)
+    dx[[0, -1]] /= 2
+    return dx * np.exp(-grid)
+
+DENSE_WEIGHTS = integration_weights()
+
+def cboe_variance(strikes, call_prices, put_prices, forward, expiry, rate=0.0):
+    """CBOE VIX-style variance from one expiry's discrete strikes.
+    
+    Out-of-the-money option prices are summed with dK / K^2 weights. K0 is
+    the first strike at or below the forward, and the usual
+    -1/T (F/K0 - 1)^2 correction is applied. Strikes must be sorted.
+    """
+    strikes = np.asarray(strikes, dtype=float)
+    k0_index = max(np.searchsorted(strikes, forward, side="right") - 1, 0)
+    k0 = strikes[k0_index]
+    quotes = np.where(strikes < k0, put_prices, call_prices)
+    quotes[k0_index] = (call_prices[k0_index] + put_prices[k0_index]) / 2
+    
+    delta_k = np.gradient(strikes) if strikes.size > 1 else np.ones(1)
+    total = np.sum(delta_k / strikes ** 2 * quotes)
+    return 2 * np.exp(rate * expiry) / expiry * total - (forward / k0 - 1) ** 2 / expiry
+
+def fit_smiles(log_moneyness, vols, grid=DENSE_GRID):
+    """Interpolate each smile onto the dense grid, shape (smiles, grid).
+    
+    log_moneyness and vols are sequences with one array per smile, since
+    every expiry can have its own strikes. The interpolation is a natural
+    cubic spline inside the quoted range with flat vol extrapolation
+    outside it.
+    """
+    CubicSpline = lazy_import("scipy.interpolate").CubicSpline
+    dense = np.empty((len(vols), grid.size))
+    for i, (x, v) in enumerate(zip(log_moneyness, vols)):
+        order = np.argsort(x)
+        x, v = np.asarray(x, dtype=float)[order], np.asarray(v, dtype=float)[order]
+        inside = np.clip(grid, x[0], x[-1])
+        dense[i] = CubicSpline(x, v, bc_type="natural")(inside) if x.size > 2 else np.interp(inside, x, v)
+    return dense
+
+def model_free_variance(forwards, expiries, dense_vols, rates=0.0, grid=DENSE_GRID, weights=DENSE_WEIGHTS):
+    """Model-free implied variance for a batch of smiles already on the dense grid.
+    
+    Prices every out-of-the-money option on the grid for all smiles in one
+    Black-76 call, then integrates with the precomputed weights.
+    """
+    forwards = np.asarray(forwards, dtype=float)[:, None]
+    expiries = np.asarray(expiries, dtype=float)[:, None]
+    rates = np.broadcast_to(np.asarray(rates, dtype=float), forwards.shape[:1])[:, None]
+    strikes = forwards * np.exp(grid)[None, :]
+    prices = black76_price(forwards, strikes, expiries, dense_vols, rates, is_call=grid[None, :] >= 0)
+    integral = prices @ weights / forwards[:, 0]
+    return 2 * np.exp(rates[:, 0] * expiries[:, 0]) / expiries[:, 0] * integral
+
+def constant_maturity_index(expiries, variances, target_days):
+    """VIX-style index at a fixed tenor from a variance term structure.
+    
+    Total variance is interpolated linearly in time between the bracketing
+    expiries, the same way the CBOE blends near and next term. Outside the
+    quoted range the nearest expiry's variance rate is held flat.
+    expiries has shape (n,) in years and variances has shape (..., n), so
+    many dates can be computed in one call. Returns 100 * sqrt(variance).
+    """
+    expiries = np.asarray(expiries, dtype=float)
+    variances = np.asarray(variances, dtype=float)
+    target = target_days / CALENDAR_DAYS
+    
+    if expiries.size == 1 or target <= expiries[0]:
+        rate = variances[..., 0]
+    elif target >= expiries[-1]:
+        rate = variances[..., -1]
+    else:
+        upper = np.searchsorted(expiries, target)
+        t1, t2 = expiries[upper - 1], expiries[upper]
+        w1, w2 = variances[..., upper - 1] * t1, variances[..., upper] * t2
+        rate = (w1 + (w2 - w1) * (target - t1) / (t2 - t1)) / target
+    return 100 * np.sqrt(rate)
+
+def quotes_variance_term_structure(quotes, implied=None):
+    """Model-free variance per expiry from quotes loaded by vix_options.load_option_quotes.
+    
+    implied is a quotes_implied_volatility result to reuse instead of solving again.
+    """
+    vols, converged, _ = quotes_implied_volatility(quotes) if implied is None else implied
+    expiries, forwards, rates, moneyness, smiles = [], [], [], [], []
+    for days in np.unique(quotes["expiry_days"]):
+        mask = (quotes["expiry_days"] == days) & converged
+        if mask.sum() < 2:
+            continue
+        # One vol per strike: average call and put vols where both are quoted
+        strikes, inverse = np.unique(quotes["strike"][mask], return_inverse=True)
+        smile = np.bincount(inverse, weights=vols[mask]) / np.bincount(inverse)
+        forward = quotes["forward"][mask][0]
+        expiries.append(days / CALENDAR_DAYS)
+        forwards.append(forward)
+        rates.append(quotes["rate"][mask][0])
+        moneyness.append(np.log(strikes / forward))
+        smiles.append(smile)
+    if not expiries:
+        return np.empty(0), np.empty(0)
+    variances = model_free_variance(forwards, expiries, fit_smiles(moneyness, smiles), rates)
+    return np.array(expiries), variances